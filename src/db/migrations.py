@@ -0,0 +1,112 @@
+"""
+Versioned schema migrations, applied on startup after create_all.
+
+create_all only creates missing tables, so every change to existing tables
+(indexes, columns) is added here as a new Migration with the next version.
+Applied versions are stored in schema_migrations table. Statements must be
+idempotent (IF NOT EXISTS), several workers may run migrations at once.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src import models  # noqa: F401, регистрирует таблицы в Base.metadata
+from src.db.session import Base
+from src.utils.logger import logger
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def create_index(name: str, table: str, columns: str) -> Callable[[Connection], None]:
+    """Index creation which does not lock writes on postgres (CONCURRENTLY needs autocommit)"""
+    def apply(conn: Connection) -> None:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+        else:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    return apply
+
+
+def drop_index(name: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        else:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    return apply
+
+
+def add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+        elif column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return apply
+
+
+def steps(*actions: Callable[[Connection], None]) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        for action in actions:
+            action(conn)
+    return apply
+
+
+# Имена индексов совпадают с объявленными в моделях, чтобы create_all и миграции не дублировали их
+MIGRATIONS: List[Migration] = [
+    Migration(1, "chats_wallet_id_index", create_index("ix_chats_wallet_id", "chats", "wallet_id")),
+    Migration(
+        2,
+        "chat_history_chat_id_timestamp_index",
+        create_index("ix_chat_history_chat_id_timestamp", "chat_history", "chat_id, timestamp"),
+    ),
+    # id в индексе нужен для keyset пагинации истории по (timestamp, id)
+    Migration(
+        3,
+        "chat_history_chat_id_timestamp_id_index",
+        steps(
+            create_index("ix_chat_history_chat_id_timestamp_id", "chat_history", "chat_id, timestamp, id"),
+            drop_index("ix_chat_history_chat_id_timestamp"),
+        ),
+    ),
+    # Старые чаты с именем "New Chat" не помечаем: их имя мог задать пользователь
+    Migration(4, "chats_name_pending", add_column("chats", "name_pending", "BOOLEAN NOT NULL DEFAULT false")),
+]
+
+
+async def migrate(engine: AsyncEngine) -> None:
+    """Create missing tables and apply pending migrations in version order"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(schema_migrations.create, checkfirst=True)
+        applied = set((await conn.execute(select(schema_migrations.c.version))).scalars())
+
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+
+        logger.info(f"Applying migration {migration.version} {migration.name}")
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.run_sync(migration.apply)
+            try:
+                await conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+            except IntegrityError:
+                # Миграцию параллельно применил другой воркер
+                pass
@@ -1,16 +1,67 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
-DATABASE_URL = "sqlite+aiosqlite:///./db/test.db"
-os.makedirs(os.path.dirname(DATABASE_URL.split("sqlite+aiosqlite:///")[1]), exist_ok=True)
+from src.config import settings
+
+
+def _database_url(url: str) -> str:
+    """Normalize postgres urls to asyncpg driver"""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: читатели не блокируют писателя, NORMAL безопасен в WAL и не делает fsync на каждый коммит
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.close()
+
+
+DATABASE_URL = _database_url(settings.DATABASE_URL)
+url = make_url(DATABASE_URL)
+is_sqlite = url.get_backend_name() == "sqlite"
+in_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+engine_kwargs = {"echo": settings.DB_ECHO, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+if not in_memory:
+    engine_kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+if is_sqlite:
+    engine_kwargs["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT}
+    if not in_memory:
+        os.makedirs(os.path.dirname(url.database) or ".", exist_ok=True)
+
+engine = create_async_engine(DATABASE_URL, **engine_kwargs)
+if is_sqlite:
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 Base = declarative_base()
 
+
+def dialect_insert(table):
+    """INSERT with on_conflict_do_update/returning for current database (postgres or sqlite)"""
+    if is_sqlite:
+        return sqlite_insert(table)
+    return postgresql_insert(table)
+
+
 async def get_async_db():
     async with AsyncSessionLocal() as session:
         yield session
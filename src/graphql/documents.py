@@ -0,0 +1,105 @@
+import re
+import hashlib
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from src.config import settings
+from src.graphql import queries
+
+KEYS = ("MintAddress", "Symbol", "Name")
+TIME_UNITS = ("minutes", "hours", "days")
+
+# Типы переменных, суффикс токена в batch запросах (_0, _1, ...) не учитывается
+VARIABLE_TYPES = {
+    "value": "String",
+    "symbol": "String",
+    "owner": "String",
+    "since": "DateTime",
+    "now": "DateTime",
+    "time_count": "Int",
+}
+
+
+class Document:
+    """Compiled GraphQL document: query text with declared variables and its sha256 hash"""
+
+    def __init__(self, name: str, selection: str):
+        self.name = name
+        self.variables: List[str] = sorted(set(re.findall(r"\$(\w+)", selection)))
+
+        declarations = ", ".join(
+            f"${variable}: {VARIABLE_TYPES[re.sub(r'_[0-9]+$', '', variable)]}" for variable in self.variables
+        )
+        signature = f"{name}({declarations})" if declarations else name
+        self.text = f"query {signature} {{{selection}}}"
+        self.sha256 = hashlib.sha256(self.text.encode()).hexdigest()
+
+        _validate(self)
+
+    def payload(self, persisted: bool = False, **variables) -> dict:
+        """Request body for Bitquery, with persisted=True only the document hash is sent"""
+        if set(variables) != set(self.variables):
+            raise ValueError(f"Document {self.name} expects variables {self.variables}, got {sorted(variables)}")
+
+        if persisted:
+            return {
+                "variables": variables,
+                "extensions": {"persistedQuery": {"version": 1, "sha256Hash": self.sha256}},
+            }
+        return {"query": self.text, "variables": variables}
+
+
+def _validate(document: Document) -> None:
+    """Checks that brackets are balanced outside of string literals"""
+    stack = []
+    in_string = False
+    for char in document.text:
+        if char == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char in "{(":
+            stack.append("}" if char == "{" else ")")
+        elif char in "})":
+            if not stack or stack.pop() != char:
+                raise ValueError(f"Unbalanced brackets in GraphQL document {document.name}")
+
+    if stack or in_string:
+        raise ValueError(f"Unbalanced brackets in GraphQL document {document.name}")
+
+
+@lru_cache(maxsize=512)
+def get_document(selection: str, keys: Tuple[str, ...] = (), time_unit: str = "", batch: bool = False) -> Document:
+    """
+    Compiled document for selection from src/graphql/queries.py (name without _selection suffix).
+
+    keys - field to search token by, one per token; batch=True builds one document
+    for all keys with aliases prefixed by t{index}_ and variables suffixed by _{index}.
+
+    get_document("chart", ("MintAddress",), "hours").payload(value=mint_address, time_count=4)
+    """
+    template = getattr(queries, f"{selection}_selection")
+
+    if batch:
+        body = "".join(
+            template.format(prefix=f"t{index}_", suffix=f"_{index}", key=key, time_unit=time_unit)
+            for index, key in enumerate(keys)
+        )
+    else:
+        body = template.format(prefix="", suffix="", key=keys[0] if keys else "", time_unit=time_unit)
+
+    name = "_".join(part for part in (selection, "batch" if batch else "", *keys, time_unit) if part)
+    return Document(name, body)
+
+
+def compile_documents() -> Dict[str, Document]:
+    """Compiles all single token documents, called on import"""
+    documents = [get_document(selection) for selection in ("pumpfun_top_tokens", "top_trending", "balance", "find_ca_by_symbol")]
+    for key in KEYS:
+        documents += [get_document("chart", (key,), time_unit) for time_unit in TIME_UNITS]
+        documents += [get_document(selection, (key,)) for selection in ("token_info", "top_traders", "top_holders")]
+    return {document.name: document for document in documents}
+
+
+documents = compile_documents()
@@ -1,24 +1,27 @@
 """
-Получает график токена в формате ohcl.
-На вход нужно заменить плейсхолдеры:
-    - key
-    - value
-    - time_unit
-    - time_count
-Пример использования:
+Тела GraphQL запросов к Bitquery. Из них при импорте собираются документы
+с переменными (см. src/graphql/documents.py), напрямую их не форматируют.
+
+Структурные плейсхолдеры (меняют сам документ):
+    - key - по чему искать токен (MintAddress, Symbol, Name)
+    - time_unit - единица интервала (minutes, hours, days)
+    - prefix, suffix - префикс алиасов и суффикс переменных токена в batch запросе
+Значения передаются переменными: $value, $time_count, $since, $now, $owner, $symbol.
+"""
 
-chart_query_template.format(key=key, value=value, time_unit=time_unit, time_count=time_count)
+"""
+Получает график токена в формате ohcl.
+Переменные: $value, $time_count
 """
 
-chart_query_template = """
-query MyQuery {{
-  ohcl: Solana(dataset: combined) {{
+chart_selection = """
+  {prefix}ohcl: Solana(dataset: combined) {{
     DEXTradeByTokens(
           orderBy: {{descendingByField: "Block_Timefield"}}
           where: {{
             Trade: {{
               Currency: {{
-                {key}: {{is: "{value}"}}
+                {key}: {{is: $value{suffix}}}
               }}
               Side: {{
                 Currency: {{
@@ -32,7 +35,7 @@ query MyQuery {{
           limit: {{count: 300}}
         ) {{
           Block {{
-            Timefield: Time(interval: {{in: {time_unit}, count: {time_count}}})
+            Timefield: Time(interval: {{in: {time_unit}, count: $time_count}})
           }}
           volume: sum(of: Trade_Amount)
           Trade {{
@@ -44,12 +47,12 @@ query MyQuery {{
           count
         }}
   }}
-  token_info: Solana {{
+  {prefix}token_info: Solana {{
       DEXTradeByTokens(
           where: {{
             Trade: {{
               Currency: {{
-                {key}: {{is: "{value}"}}
+                {key}: {{is: $value{suffix}}}
               }}
             }}
           }}
@@ -68,60 +71,53 @@ query MyQuery {{
           }}
         }}
   }}
-}}
 """
 
-""""
+
+"""
 Получает топ 10 токенов с pumpfun.
 """
 
-pumpfun_token_sorted_by_marketcap = """
-   {
-  Solana {
+pumpfun_top_tokens_selection = """
+  Solana {{
     DEXTrades(
-      limitBy: {by: Trade_Buy_Currency_MintAddress, count: 1}
-      orderBy: {descending: Trade_Buy_Price}
-      where: {Trade: {Dex: {ProtocolName: {is: "pump"}}, Buy: {Currency: {MintAddress: {notIn: ["11111111111111111111111111111111"]}}}}, Transaction: {Result: {Success: true}}}
-      limit: {count: 10}
-    ) {
-      Trade {
-        Buy {
+      limitBy: {{by: Trade_Buy_Currency_MintAddress, count: 1}}
+      orderBy: {{descending: Trade_Buy_Price}}
+      where: {{Trade: {{Dex: {{ProtocolName: {{is: "pump"}}}}, Buy: {{Currency: {{MintAddress: {{notIn: ["11111111111111111111111111111111"]}}}}}}}}, Transaction: {{Result: {{Success: true}}}}}}
+      limit: {{count: 10}}
+    ) {{
+      Trade {{
+        Buy {{
           Price
           PriceInUSD
-          Currency {
+          Currency {{
             Name
             Symbol
             MintAddress
             Decimals
             Fungible
             Uri
-          }
-        }
-      }
-    }
-  }
-}
+          }}
+        }}
+      }}
+    }}
+  }}
 """
 
 """
 Получает информацию о токене по его идентификатору.
-На вход нужно заменить плейсхолдеры:
-    - key - по чему искать токен (са, имя, тикер)
+Переменные:
     - value - значение поиска (сам са, имя, тикер)
-    - since_time_formatted
-    - now_time_formatted
-Пример использования:
-
-token_info_template.format(key=key, value=value, since_time_formatted=since_time_formatted, now_time_formatted=now_time_formatted)
+    - since
+    - now
 """
-token_info_template = """
-query MyQuery {{
-  Solana {{
+token_info_selection = """
+  {prefix}Solana: Solana {{
     DEXTradeByTokens(
       where: {{
         Transaction: {{Result: {{Success: true}}}},
-        Trade: {{Currency: {{{key}: {{is: "{value}"}}}}}},
-        Block: {{Time: {{since: "{since_time_formatted}"}}}}
+        Trade: {{Currency: {{{key}: {{is: $value{suffix}}}}}}},
+        Block: {{Time: {{since: $since}}}}
       }}
     ) {{
       Trade {{
@@ -133,7 +129,7 @@ query MyQuery {{
         start: PriceInUSD(minimum: Block_Time)
         min5: PriceInUSD(
           minimum: Block_Time
-          if: {{Block: {{Time: {{after: "{now_time_formatted}"}}}}}}
+          if: {{Block: {{Time: {{after: $now}}}}}}
         )
         end: PriceInUSD(maximum: Block_Time)
         Dex {{
@@ -153,26 +149,26 @@ query MyQuery {{
         }}
       }}
       makers: count(distinct: Transaction_Signer)
-      makers_5min: count(distinct: Transaction_Signer if: {{Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      makers_5min: count(distinct: Transaction_Signer if: {{Block: {{Time: {{after: $now}}}}}})
       buyers: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}}})
-      buyers_5min: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      buyers_5min: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: $now}}}}}})
       sellers: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}}})
-      sellers_5min: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      sellers_5min: count(distinct: Transaction_Signer if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: $now}}}}}})
       trades: count
-      trades_5min: count(if: {{Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      trades_5min: count(if: {{Block: {{Time: {{after: $now}}}}}})
       traded_volume: sum(of: Trade_Side_AmountInUSD)
-      traded_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      traded_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Block: {{Time: {{after: $now}}}}}})
       buy_volume: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}}})
-      buy_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      buy_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: $now}}}}}})
       sell_volume: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}}})
-      sell_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      sell_volume_5min: sum(of: Trade_Side_AmountInUSD if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: $now}}}}}})
       buys: count(if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}}})
-      buys_5min: count(if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      buys_5min: count(if: {{Trade: {{Side: {{Type: {{is: buy}}}}}}, Block: {{Time: {{after: $now}}}}}})
       sells: count(if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}}})
-      sells_5min: count(if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: "{now_time_formatted}"}}}}}})
+      sells_5min: count(if: {{Trade: {{Side: {{Type: {{is: sell}}}}}}, Block: {{Time: {{after: $now}}}}}})
     }}
     TokenSupplyUpdates(
-      where: {{TokenSupplyUpdate: {{Currency: {{{key}: {{is: "{value}"}}}}}}}}
+      where: {{TokenSupplyUpdate: {{Currency: {{{key}: {{is: $value{suffix}}}}}}}}}
       limit: {{count: 1}}
       orderBy: {{descending: Block_Time}}
     ) {{
@@ -183,33 +179,26 @@ query MyQuery {{
     }}
       BalanceUpdates(
           where: {{
-            BalanceUpdate: {{Currency: {{{key}: {{is: "{value}"}}}}}}
+            BalanceUpdate: {{Currency: {{{key}: {{is: $value{suffix}}}}}}}
           }}
         ) {{
           count: count(distinct: BalanceUpdate_Account_Owner)
       }}
   }}
-}}
 """
 
+
 """
 Выводит топ трейдеров по обьему по токену.
-На вход нужно заменить плейсхолдеры:
-    - key
-    - value
-    - since_time_formatted
-Пример использования:
-
-top_traders_template.format(key=key, value=value, since_time_formatted=since_time_formatted)
+Переменные: $value, $since
 """
 
-top_traders_template = """
-query TopTraders {{
+top_traders_selection = """
   Solana {{
     DEXTradeByTokens(
       orderBy: {{descendingByField: "volumeUsd"}}
       limit: {{count: 20}}
-      where: {{Trade: {{Currency: {{{key}: {{is: "{value}"}}}}, Side: {{Amount: {{gt: "0"}}}}}}, Transaction: {{Result: {{Success: true}}}}, Block: {{Time: {{since: "{since_time_formatted}"}}}}}}
+      where: {{Trade: {{Currency: {{{key}: {{is: $value{suffix}}}}}, Side: {{Amount: {{gt: "0"}}}}}}, Transaction: {{Result: {{Success: true}}}}, Block: {{Time: {{since: $since}}}}}}
     ) {{
       Trade {{
         Account {{
@@ -224,15 +213,17 @@ query TopTraders {{
       volumeUsd: sum(of: Trade_Side_AmountInUSD)
     }}
   }}
-}}
+"""
 
+"""
+Выводит топ холдеров токена и его supply.
+Переменные: $value, $since
 """
 
-top_holders_template = """
-query MyQuery {{
+top_holders_selection = """
   Solana {{
     TokenSupplyUpdates(
-      where: {{TokenSupplyUpdate: {{Currency: {{{key}: {{is: "{value}"}}}}}}}}
+      where: {{TokenSupplyUpdate: {{Currency: {{{key}: {{is: $value{suffix}}}}}}}}}
       limit: {{count: 1}}
       orderBy: {{descending: Block_Time}}
     ) {{
@@ -244,7 +235,7 @@ query MyQuery {{
     Top_holders: BalanceUpdates(
       orderBy: {{descendingByField: "BalanceUpdate_balance_maximum"}}
       limit: {{count: 20}}
-      where: {{BalanceUpdate: {{Currency: {{{key}: {{is: "{value}"}}}}}}, Block: {{Time: {{since: "{since_time_formatted}"}}}}}}
+      where: {{BalanceUpdate: {{Currency: {{{key}: {{is: $value{suffix}}}}}}}, Block: {{Time: {{since: $since}}}}}}
     ) {{
       BalanceUpdate {{
         Account {{
@@ -254,11 +245,14 @@ query MyQuery {{
       }}
     }}
   }}
-}}
 """
 
-top_trending_template = """
-query {{
+"""
+Выводит трендовые токены.
+Переменные: $since
+"""
+
+top_trending_selection = """
   Solana {{
     DEXTradeByTokens(
       where: {{
@@ -268,7 +262,7 @@ query {{
           }}
         }}, 
         Block: {{
-          Time: {{after: "{since_time_formatted}"}}
+          Time: {{after: $since}}
         }}, 
         Trade: {{
           Dex: {{
@@ -342,24 +336,17 @@ query {{
       count(selectWhere: {{ge: "100"}})
     }}
   }}
-}}
-
 """
 
 """
 Retrieve balance of wallet.
-Placeholders:
-    - mint_address
-Usage:
-
-balance_template.format(mint_address=mint_address)
+Variables: $owner
 """
-balance_template = """
-query MyQuery {{
+balance_selection = """
   Solana {{
     BalanceUpdates(
       limit: {{count: 20}}
-      where: {{BalanceUpdate: {{Account: {{Owner: {{is: "{mint_address}"}}}}}}}}
+      where: {{BalanceUpdate: {{Account: {{Owner: {{is: $owner}}}}}}}}
       orderBy: {{descendingByField: "BalanceUpdate_Balance_maximum"}}
     ) {{
       BalanceUpdate {{
@@ -373,17 +360,20 @@ query MyQuery {{
       }}
     }}
   }}
-}}
 """
 
-find_ca_by_symbol_template = """
-query MyQuery {{
+"""
+Находит са токена с наибольшим supply в USD по тикеру.
+Переменные: $symbol
+"""
+
+find_ca_by_symbol_selection = """
   Solana {{
     TokenSupplyUpdates(
       where: {{
         TokenSupplyUpdate: {{
           Currency: {{
-            Symbol: {{is: "{value}"}}
+            Symbol: {{is: $symbol}}
           }}
         }}
       }}
@@ -405,5 +395,4 @@ query MyQuery {{
       }}
     }}
   }}
-}}
 """
@@ -1,3 +1,8 @@
+# Таймер импортов должен стоять до остальных импортов приложения
+from src.utils import profiling
+
+profiling.start()
+
 import os
 import time
 
@@ -9,10 +14,16 @@ from redis import asyncio as aioredis
 from src.routers import user
 from src.routers import chat
 from src.routers import toolcall
+from src.routers import metrics
 from src.config import settings
-from src.db.session import Base, engine
-from src.utils.chat import create_agent
+from src.db.migrations import migrate
+from src.db.session import engine
+from src.utils.cache import set_redis
+from src.utils.chat import agent_pool, canned_answers
+from src.utils.chat_naming import chat_namer
+from src.utils.http_client import start_http_clients, close_http_clients
 from src.utils.logger import logger
+from src.utils.token_index import token_index
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -26,12 +37,12 @@ class LoggingMiddleware(BaseHTTPMiddleware):
 
         process_time = time.time() - start_time
         logger.info(f"Response: {response.status_code} | Time: {process_time:.3f}s")
+        profiling.request_served()
 
         return response
 
 async def create_database():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await migrate(engine)
 
 app = FastAPI()
 
@@ -54,7 +65,7 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    routers = [user.router, chat.router, toolcall.router]
+    routers = [user.router, chat.router, toolcall.router, metrics.router]
     for router in routers:
         application.include_router(
             router,
@@ -69,7 +80,10 @@ app = create_app()
 
 @app.on_event("startup")
 async def startup_event():
-    app.state.agent = await create_agent()
+    await start_http_clients()
+    agent_pool.warm()
+    app.state.agents = agent_pool
+    canned_answers.load()
 
     redis = await aioredis.from_url(
         f"redis://{settings.REDIS_HOST}",
@@ -77,4 +91,14 @@ async def startup_event():
         decode_responses=True,
     )
     await FastAPILimiter.init(redis)
-    await create_database()
\ No newline at end of file
+    set_redis(redis)
+    await token_index.warm()
+    await create_database()
+    chat_namer.start()
+    profiling.startup_complete()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await chat_namer.stop()
+    await close_http_clients()
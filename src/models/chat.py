@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, false
 from sqlalchemy.orm import relationship
 from src.db.session import Base
 
@@ -8,6 +8,8 @@ class Chat(Base):
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, unique=True, nullable=False)
     name = Column(String, nullable=False)
-    wallet_id = Column(String, ForeignKey("users.wallet_id"), nullable=False)
+    # Имя еще не сгенерировано (стоит заглушка), пользовательское имя сбрасывает флаг
+    name_pending = Column(Boolean, nullable=False, default=False, server_default=false())
+    wallet_id = Column(String, ForeignKey("users.wallet_id"), nullable=False, index=True)
     history = relationship("ChatHistory", back_populates="chat")
     owner = relationship("User", back_populates="chats")
\ No newline at end of file
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from src.db.session import Base
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
+    __table_args__ = (Index("ix_chat_history_chat_id_timestamp_id", "chat_id", "timestamp", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
@@ -5,7 +5,7 @@ from starlette.responses import StreamingResponse
 
 from src.schemas.chat import ChatMessage, ChatRequest
 from src.config import settings
-from src.utils.chat import get_agent, stream_response
+from src.utils.chat import get_agents, stream_response
 from src.utils.logger import log_exceptions
 
 router = APIRouter(prefix="/chat", tags=["chats"])
@@ -22,6 +22,6 @@ router = APIRouter(prefix="/chat", tags=["chats"])
     }
 })
 @log_exceptions
-async def generate(data: ChatRequest, agent_executor=Depends(get_agent)) -> str:
+async def generate(data: ChatRequest, agents=Depends(get_agents)) -> str:
     logging.info(f"Request to /generate {data}")
-    return StreamingResponse(stream_response(agent_executor, data.messages), media_type="text/plain")
+    return StreamingResponse(stream_response(agents, data.messages, data.chat_uuid), media_type="text/plain")
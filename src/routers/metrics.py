@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from src.utils import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+async def get_metrics() -> dict:
+    """Process-local counters: http pools, caches, routing hit rates"""
+    return metrics.snapshot()
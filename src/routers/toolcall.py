@@ -1,22 +1,22 @@
 import logging
 import json
-import httpx
-import pandas as pd
+import asyncio
 import datetime
-import pytz
-import requests
 
 from fastapi import APIRouter, HTTPException, Depends, Query
 from src.utils.logger import log_exceptions, logger
-from src.schemas.chart import ChartResponse
-from src.schemas.tokenvolume import TokenVolumeResponse
+from src.schemas.chart import ChartResponse, ChartBatchResponse
+from src.schemas.tokenvolume import TokenVolumeResponse, TokenVolumeBatchResponse
 from src.schemas.pumpfuntoptokens import PumpFunResponse
 from src.schemas.topresponse import TopTradersResponse, TokenHoldersResponse, TrendingTokensResponse
 from src.schemas.balance import WalletBalanceResponse
-from src.graphql.queries import *
+from src.graphql.documents import Document, get_document
 from typing import List, Optional, Dict
 from src.config import settings
-from urllib.parse import urlparse
+from src.utils.cache import ResponseCache, cache_response
+from src.utils.http_client import get_client
+from src.utils.ipfs import enrich_with_metadata
+from src.utils.token_index import token_index
 
 router = APIRouter(prefix="/toolcall", tags=["toolcalls"])
 
@@ -45,8 +45,16 @@ interval_mapping = {
     "30d": {"unit": "days", "count": 30},
 }
 
+response_cache = ResponseCache("toolcall")
+
+
+def interval_ttl(params: dict) -> int:
+    """Response cache ttl for endpoint params, depends on requested interval"""
+    return settings.RESPONSE_CACHE_TTL.get(params.get("interval"), settings.RESPONSE_CACHE_DEFAULT_TTL)
+
 
 @router.get("/market-chart", response_model=ChartResponse)
+@cache_response(response_cache, "market-chart", ttl=interval_ttl)
 async def get_chart(
     mint_address: str = Query(..., description="Mint address of the token"),
     interval: str = Query("4h", description="Time interval for the chart (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
@@ -60,68 +68,82 @@ async def get_chart(
 
     key, value = await classify_input(mint_address)
 
-    query = {
-        "query": chart_query_template.format(key=key, value=value, time_unit=time_unit, time_count=time_count),
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("chart", (key,), time_unit), value=value, time_count=time_count)
 
     if "data" not in data or "ohcl" not in data["data"]:
         raise HTTPException(status_code=400, detail="Invalid response from Bitquery")
 
-    ohcl = data["data"]["ohcl"]["DEXTradeByTokens"]
-    token_info = data["data"]["token_info"]["DEXTradeByTokens"][0]["Trade"]
+    chart = parse_chart(data["data"])
+    await enrich_with_metadata([chart["token_info"]["Currency"]])
+
+    return {"data": chart}
+
+
+@router.get("/market-chart/batch", response_model=ChartBatchResponse)
+@cache_response(response_cache, "market-chart-batch", ttl=interval_ttl)
+async def get_chart_batch(
+    mint_addresses: List[str] = Query(..., description="Mint addresses of the tokens"),
+    interval: str = Query("4h", description="Time interval for the chart (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
+):
+    """Charts of several tokens with one Bitquery request, tokens without data are omitted"""
+    if interval not in interval_mapping:
+        raise HTTPException(status_code=400, detail="Invalid interval parameter")
+    if len(mint_addresses) > settings.BATCH_MAX_TOKENS:
+        raise HTTPException(status_code=400, detail=f"Too many tokens, max {settings.BATCH_MAX_TOKENS}")
+
+    time_unit = interval_mapping[interval]["unit"]
+    time_count = interval_mapping[interval]["count"]
+
+    keys = await asyncio.gather(*[classify_input(mint_address) for mint_address in mint_addresses])
+
+    data = await fetch_bitquery(
+        get_document("chart", tuple(key for key, _ in keys), time_unit, batch=True),
+        time_count=time_count,
+        **{f"value_{index}": value for index, (_, value) in enumerate(keys)}
+    )
+
+    if "data" not in data:
+        raise HTTPException(status_code=400, detail="Invalid response from Bitquery")
+
+    charts = {}
+    for index, mint_address in enumerate(mint_addresses):
+        try:
+            charts[mint_address] = parse_chart(data["data"], prefix=f"t{index}_")
+        except (KeyError, IndexError, TypeError, ZeroDivisionError):
+            logger.warning(f"No chart data for {mint_address}")
+
+    await enrich_with_metadata([chart["token_info"]["Currency"] for chart in charts.values()])
+
+    return {"data": charts}
+
+
+def parse_chart(data: dict, prefix: str = "") -> dict:
+    """Extract ohcl and token info of one token from (batch) chart query result"""
+    ohcl = data[f"{prefix}ohcl"]["DEXTradeByTokens"]
+    token_info = data[f"{prefix}token_info"]["DEXTradeByTokens"][0]["Trade"]
 
     open_price = ohcl[0]['Trade']['open']
     close_price = ohcl[0]['Trade']['close']
 
     # Вычисление процентного изменения
-    price_change_percent = ((close_price - open_price) / open_price) * 100
-
-    async with httpx.AsyncClient() as client:
-        uri = token_info["Currency"].get("Uri")
-        metadata = await fetch_ipfs_metadata(uri) if uri else {}
-        token_info["Currency"].update({
-            "description": metadata.get("description", ""),
-            "image": metadata.get("image", ""),
-            "twitter": metadata.get("twitter", ""),
-            "website": metadata.get("website", ""),
-            "createdOn": metadata.get("createdOn", ""),
-            "priceChangePercent": price_change_percent
-        })
+    token_info["Currency"]["priceChangePercent"] = ((close_price - open_price) / open_price) * 100
 
-
-    return {"data": {"ohcl": ohcl, "token_info": token_info}}
+    return {"ohcl": ohcl, "token_info": token_info}
 
 
 
 @router.get("/pumpfun-top-tokens", response_model=PumpFunResponse)
 @log_exceptions
+@cache_response(response_cache, "pumpfun-top-tokens", ttl=interval_ttl)
 async def get_pumpfun_top_tokens():
-    query = {
-        "query": pumpfun_token_sorted_by_marketcap,
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("pumpfun_top_tokens"))
 
     if "data" not in data or "Solana" not in data["data"] or "DEXTrades" not in data["data"]["Solana"]:
         raise HTTPException(status_code=400, detail="Invalid response from Bitquery")
 
     trades = data["data"]["Solana"]["DEXTrades"]
 
-    async with httpx.AsyncClient() as client:
-        for trade in trades:
-            uri = trade["Trade"]["Buy"]["Currency"].get("Uri")
-            metadata = await fetch_ipfs_metadata(uri) if uri else {}
-            trade["Trade"]["Buy"]["Currency"].update({
-                "description": metadata.get("description", ""),
-                "image": metadata.get("image", ""),
-                "twitter": metadata.get("twitter", ""),
-                "website": metadata.get("website", ""),
-                "createdOn": metadata.get("createdOn", "")
-            })
+    await enrich_with_metadata([trade["Trade"]["Buy"]["Currency"] for trade in trades])
 
     return {"data": trades}
 
@@ -138,7 +160,7 @@ async def get_volume(
     time_unit = interval_mapping[interval]["unit"]
     time_count = interval_mapping[interval]["count"]
 
-    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
     since_time = now - datetime.timedelta(**{time_unit: time_count})
 
     since_time_formatted = since_time.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -146,25 +168,62 @@ async def get_volume(
 
     key, value = await classify_input(mint_address)
 
-    query = {
-        "query": token_info_template.format(
-            key=key,
-            value=value,
-            since_time_formatted=since_time_formatted,
-            now_time_formatted=now_time_formatted
-        ),
-        "variables": "{}"
-    }
+    data = await fetch_bitquery(
+        get_document("token_info", (key,)),
+        value=value,
+        since=since_time_formatted,
+        now=now_time_formatted
+    )
 
-    data = await fetch_bitquery(query)
+    if "data" not in data:
+        raise HTTPException(status_code=400, detail="Invalid response from Bitquery")
+
+    return calculate_volumes(data["data"])
+
+
+@router.get("/token-volume/batch", response_model=TokenVolumeBatchResponse)
+async def get_volume_batch(
+    mint_addresses: List[str] = Query(..., description="Mint addresses of the tokens"),
+    interval: str = Query("1d", description="Time interval for the chart (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
+):
+    """Volumes of several tokens with one Bitquery request, tokens without trades are omitted"""
+    if interval not in interval_mapping:
+        raise HTTPException(status_code=400, detail="Invalid interval parameter")
+    if len(mint_addresses) > settings.BATCH_MAX_TOKENS:
+        raise HTTPException(status_code=400, detail=f"Too many tokens, max {settings.BATCH_MAX_TOKENS}")
+
+    time_unit = interval_mapping[interval]["unit"]
+    time_count = interval_mapping[interval]["count"]
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    since_time = now - datetime.timedelta(**{time_unit: time_count})
+
+    since_time_formatted = since_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    now_time_formatted = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    keys = await asyncio.gather(*[classify_input(mint_address) for mint_address in mint_addresses])
+
+    data = await fetch_bitquery(
+        get_document("token_info", tuple(key for key, _ in keys), batch=True),
+        since=since_time_formatted,
+        now=now_time_formatted,
+        **{f"value_{index}": value for index, (_, value) in enumerate(keys)}
+    )
 
     if "data" not in data:
         raise HTTPException(status_code=400, detail="Invalid response from Bitquery")
 
-    response_string = json.dumps(data["data"])
-    return await calculate_volumes(response_string)
+    volumes = {}
+    for index, mint_address in enumerate(mint_addresses):
+        try:
+            volumes[mint_address] = calculate_volumes({"Solana": data["data"][f"t{index}_Solana"]})
+        except (KeyError, HTTPException):
+            logger.warning(f"No volume data for {mint_address}")
+
+    return {"data": volumes}
 
 @router.get("/top-traders", response_model=TopTradersResponse)
+@cache_response(response_cache, "top-traders", ttl=interval_ttl)
 async def get_top_traders(
     mint_address: str = Query(..., description="Mint address of the token"),
     interval: str = Query("1d", description="Time interval of the top (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
@@ -175,18 +234,13 @@ async def get_top_traders(
     time_unit = interval_mapping[interval]["unit"]
     time_count = interval_mapping[interval]["count"]
 
-    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
     since_time = now - datetime.timedelta(**{time_unit: time_count})
     since_time_formatted = since_time.strftime("%Y-%m-%dT%H:%M:%SZ")
 
     key, value = await classify_input(mint_address)
 
-    query = {
-        "query": top_traders_template.format(key=key, value=value, since_time_formatted=since_time_formatted),
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("top_traders", (key,)), value=value, since=since_time_formatted)
 
     dex_trades = data.get("data", {}).get("Solana", {}).get("DEXTradeByTokens", [])
     if not dex_trades:
@@ -196,6 +250,7 @@ async def get_top_traders(
 
 
 @router.get("/top-holders", response_model=TokenHoldersResponse)
+@cache_response(response_cache, "top-holders", ttl=interval_ttl)
 async def get_token_holders(
     mint_address: str = Query(..., description="Mint address of the token"),
     interval: str = Query("1d", description="Time interval of the top (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
@@ -206,18 +261,13 @@ async def get_token_holders(
     time_unit = interval_mapping[interval]["unit"]
     time_count = interval_mapping[interval]["count"]
 
-    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
     since_time = now - datetime.timedelta(**{time_unit: time_count})
     since_time_formatted = since_time.strftime("%Y-%m-%dT%H:%M:%SZ")
 
     key, value = await classify_input(mint_address)
 
-    query = {
-        "query": top_holders_template.format(key=key, value=value, since_time_formatted=since_time_formatted),
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("top_holders", (key,)), value=value, since=since_time_formatted)
 
     solana_data = data.get("data", {}).get("Solana", {})
 
@@ -237,6 +287,7 @@ async def get_token_holders(
 
 
 @router.get("/trending-tokens", response_model=TrendingTokensResponse)
+@cache_response(response_cache, "trending-tokens", ttl=interval_ttl)
 async def get_trending_tokens(
     interval: str = Query("1d", description="Time interval of the top (1m, 5m, 15m, 30m, 60m, 1d, 3d, 7d, 30d)")
 ):
@@ -246,16 +297,11 @@ async def get_trending_tokens(
     time_unit = interval_mapping[interval]["unit"]
     time_count = interval_mapping[interval]["count"]
 
-    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
     since_time = now - datetime.timedelta(**{time_unit: time_count})
     since_time_formatted = since_time.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-    query = {
-        "query": top_trending_template.format(since_time_formatted=since_time_formatted),
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("top_trending"), since=since_time_formatted)
 
     trending_tokens = data.get("data", {}).get("Solana", {}).get("DEXTradeByTokens", [])
 
@@ -267,17 +313,7 @@ async def get_trending_tokens(
         price_1h_ago = token.get("Trade", {}).get("price_1h_ago", 0)
         token["price_change_percent"] = ((price_last - price_1h_ago) / price_1h_ago) * 100 if price_1h_ago > 0 else 0
 
-    async with httpx.AsyncClient() as client:
-        for token in trending_tokens:
-            uri = token["Trade"]["Currency"].get("Uri")
-            metadata = await fetch_ipfs_metadata(uri) if uri else {}
-            token["Trade"]["Currency"].update({
-                "description": metadata.get("description", ""),
-                "image": metadata.get("image", ""),
-                "twitter": metadata.get("twitter", ""),
-                "website": metadata.get("website", ""),
-                "createdOn": metadata.get("createdOn", "")
-            })
+    await enrich_with_metadata([token["Trade"]["Currency"] for token in trending_tokens])
 
     return {"data": trending_tokens}
 
@@ -289,12 +325,7 @@ async def get_wallet_balance(
     mint_address: str = Query(..., description="Mint address of wallet")
 ):
     """Retrieve balance of wallet and modify it with ipfs data"""
-    query = {
-        "query": balance_template.format(mint_address=mint_address),
-        "variables": "{}"
-    }
-
-    data = await fetch_bitquery(query)
+    data = await fetch_bitquery(get_document("balance"), owner=mint_address)
 
     balance_updates = data.get("data", {}).get("Solana", {}).get("BalanceUpdates", [])
 
@@ -302,11 +333,7 @@ async def get_wallet_balance(
     balance_updates = [b for b in balance_updates if b["BalanceUpdate"]["Currency"]["Uri"]]
 
     # Modify with ipfs metadata
-    async with httpx.AsyncClient() as client:
-        for balance_update in balance_updates:
-            uri = balance_update["BalanceUpdate"]["Currency"]["Uri"]
-            metadata = await fetch_ipfs_metadata(uri) if uri else {}
-            balance_update["BalanceUpdate"]["Currency"].update(metadata)
+    await enrich_with_metadata([b["BalanceUpdate"]["Currency"] for b in balance_updates])
 
     result = {
         "data": {
@@ -333,74 +360,17 @@ async def get_wallet_balance(
     return result
 
 
-IPFS_GATEWAYS = ["https://dweb.link", "https://ipfs.io", "https://cf-ipfs.com"]
-
+async def fetch_bitquery(document: Document, **variables):
+    """Execute compiled document, with BITQUERY_PERSISTED_QUERIES only its hash is sent first"""
+    persisted = settings.BITQUERY_PERSISTED_QUERIES
+    response = await get_client("bitquery").post(
+        BITQUERY_URL, headers=headers, json=document.payload(persisted=persisted, **variables), timeout=30.0
+    )
 
-async def fetch_ipfs_metadata(uri: str) -> Optional[Dict]:
-    """Retrieve tokens metadata by  IPFS URI, using alternative gateways on errors."""
-    parsed_uri = urlparse(uri)
-
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        try:
-            response = await client.get(uri, timeout=5)
-
-            if response.status_code == 302 and "Location" in response.headers:
-                redirected_url = response.headers["Location"]
-                logging.info(f"Redirect to {redirected_url}")
-                response = await client.get(redirected_url, timeout=5)
-
-            if response.status_code == 200:
-                metadata = response.json() or {}
-
-                if "image" in metadata and isinstance(metadata["image"], str):
-                    return metadata
-            else:
-                logging.warning(f"Error code {response.status_code} for {uri}")
-        except httpx.RequestError as e:
-            logging.error(f"Bad request: {uri}. Error: {e}")
-
-    # Проверяем, является ли URL IPFS-шлюзом
-    ipfs_hash = None
-    for gateway in IPFS_GATEWAYS:
-        if parsed_uri.netloc in gateway:
-            ipfs_hash = parsed_uri.path.lstrip("/ipfs/")
-            break
-
-    # Если не нашли в списке известных шлюзов, извлекаем хеш по умолчанию
-    if not ipfs_hash:
-        path_parts = parsed_uri.path.split('/')
-        if "ipfs" in path_parts:
-            ipfs_hash = path_parts[path_parts.index("ipfs") + 1]
-        else:
-            logging.error(f"Некорректный IPFS URI: {uri}")
-            return {}
-
-    async with httpx.AsyncClient() as client:
-        for gateway in IPFS_GATEWAYS:
-            new_uri = f"{gateway}/ipfs/{ipfs_hash}"
-            try:
-                response = await client.get(new_uri, timeout=5)
-                if response.status_code == 200:
-                    metadata = response.json() or {}
-
-                    if "image" in metadata and isinstance(metadata["image"], str):
-                        image_parsed = urlparse(metadata["image"])
-                        for g in IPFS_GATEWAYS:
-                            if image_parsed.netloc in g:
-                                metadata["image"] = metadata["image"].replace(image_parsed.netloc, "ipfs.io")
-                                break
-
-                    return metadata
-                else:
-                    logging.warning(f"Неудачный статус {response.status_code} для {new_uri}")
-            except httpx.RequestError as e:
-                logging.error(f"Ошибка запроса к {new_uri}: {e}")
-
-    return {}
-
-async def fetch_bitquery(query):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(BITQUERY_URL, headers=headers, json=query, timeout=30.0)
+    if persisted and persisted_query_not_found(response):
+        response = await get_client("bitquery").post(
+            BITQUERY_URL, headers=headers, json=document.payload(**variables), timeout=30.0
+        )
 
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail="Ошибка запроса к Bitquery")
@@ -408,8 +378,32 @@ async def fetch_bitquery(query):
     data = response.json()
     return data
 
-async def calculate_volumes(response: str) -> TokenVolumeResponse:
-    data = json.loads(response)
+
+def persisted_query_not_found(response) -> bool:
+    """Bitquery does not know the document hash yet and needs full query text"""
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any("PersistedQueryNotFound" in str(error.get("message", "")) for error in errors)
+
+VOLUME_COLUMNS = ["buy_volume", "sell_volume", "traded_volume", "trades", "makers"]
+
+
+def to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def calculate_volumes(data: dict) -> TokenVolumeResponse:
+    """Aggregate token_info query result ({"Solana": {...}}) into TokenVolumeResponse.
+
+    Trades are read once into numpy columns, all totals are computed from them.
+    """
+    # numpy нужен только здесь, не грузим его при старте воркера
+    import numpy as np
 
     trades = data.get("Solana", {}).get("DEXTradeByTokens", [])
     balance_updates = data.get("Solana", {}).get("BalanceUpdates", [])
@@ -418,28 +412,35 @@ async def calculate_volumes(response: str) -> TokenVolumeResponse:
     if not trades:
         raise HTTPException(status_code=400, detail="No trade data found")
 
-    df = pd.DataFrame(trades)
+    columns = np.zeros((len(VOLUME_COLUMNS), len(trades)))
+    prices = np.full((2, len(trades)), np.nan)  # start, end
+    dexes = []
 
-    df["currency"] = df["Trade"].apply(lambda x: x["Currency"]["Symbol"] if x else None)
-    df["dex"] = df["Trade"].apply(lambda x: x["Dex"]["ProtocolName"] if x else None)
-    df["market"] = df["Trade"].apply(lambda x: x["Market"]["MarketAddress"] if x else None)
-    df["start_price"] = df["Trade"].apply(lambda x: x.get("start", 0) if x else 0)
-    df["min5_price"] = df["Trade"].apply(lambda x: x.get("min5", 0) if x else 0)
-    df["end_price"] = df["Trade"].apply(lambda x: x.get("end", 0) if x else 0)
+    for i, row in enumerate(trades):
+        for j, column in enumerate(VOLUME_COLUMNS):
+            columns[j, i] = to_float(row.get(column))
 
-    numeric_columns = ["buy_volume", "sell_volume", "traded_volume", "trades", "makers"]
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df.get(col, 0), errors="coerce").fillna(0)
-
-    total_traded_volume = df["traded_volume"].sum()
-    total_trades = df["trades"].sum()
-    total_makers = df["makers"].sum()
+        trade = row.get("Trade")
+        if trade:
+            prices[0, i] = to_float(trade.get("start", 0), np.nan)
+            prices[1, i] = to_float(trade.get("end", 0), np.nan)
+            dexes.append(trade["Dex"]["ProtocolName"])
+        else:
+            prices[:, i] = 0
+            dexes.append(None)
 
-    total_buy_volume = df["buy_volume"].sum()
-    total_sell_volume = df["sell_volume"].sum()
+    traded_volume = columns[VOLUME_COLUMNS.index("traded_volume")]
+    total_buy_volume, total_sell_volume, total_traded_volume, total_trades, total_makers = columns.sum(axis=1)
     buy_percentage = (total_buy_volume / total_traded_volume) * 100 if total_traded_volume else 0
     sell_percentage = (total_sell_volume / total_traded_volume) * 100 if total_traded_volume else 0
 
+    start_price, end_price = (np.nanmean(p) if not np.isnan(p).all() else 0 for p in prices)
+
+    # Объем по DEX: коды площадок + bincount вместо groupby
+    known = np.array([dex is not None for dex in dexes])
+    dex_names, dex_codes = np.unique(np.array([dex for dex in dexes if dex is not None], dtype=object), return_inverse=True)
+    volume_by_dex = np.bincount(dex_codes, weights=traded_volume[known], minlength=len(dex_names))
+
     total_balance_updates = sum(int(update.get("count", 0)) for update in balance_updates)
 
     if token_supply_updates:
@@ -452,12 +453,12 @@ async def calculate_volumes(response: str) -> TokenVolumeResponse:
     return TokenVolumeResponse(
         totalTradedVolume=total_traded_volume,
         averageTradeSize=total_traded_volume / total_trades if total_trades else 0,
-        priceChangePercentage=((df["end_price"].mean() - df["start_price"].mean()) / df["start_price"].mean()) * 100 if df["start_price"].mean() else 0,
+        priceChangePercentage=((end_price - start_price) / start_price) * 100 if start_price else 0,
         buySellRatio=total_buy_volume / total_sell_volume if total_sell_volume else 0,
         averageTradesPerMaker=total_trades / total_makers if total_makers else 0,
         averageVolumePerMaker=total_traded_volume / total_makers if total_makers else 0,
-        uniqueDexPlatforms=df["dex"].nunique(),
-        averageVolumeByDex=df.groupby("dex")["traded_volume"].sum().to_dict(),
+        uniqueDexPlatforms=len(dex_names),
+        averageVolumeByDex=dict(zip(dex_names.tolist(), volume_by_dex.tolist())),
         liquidity=total_traded_volume,
         totalBuyVolume=total_buy_volume,
         totalSellVolume=total_sell_volume,
@@ -468,42 +469,44 @@ async def calculate_volumes(response: str) -> TokenVolumeResponse:
         marketCapInUSD=post_balance_in_usd
     )
 
+async def find_currency_by_symbol(symbol: str) -> Optional[Dict]:
+    """Currency (Name, Symbol, MintAddress) of the largest token with given ticker"""
+    data = await fetch_bitquery(get_document("find_ca_by_symbol"), symbol=symbol)
+
+    data = data.get("data", {}).get("Solana", {}).get("TokenSupplyUpdates", [])
+    return data[0]["TokenSupplyUpdate"]["Currency"] if data else None
+
+
 async def classify_input(mint_address: str):
     if mint_address.startswith("$"):
         key = "Symbol"
         #value = mint_address - тикеры в битквери можно отправлять и с долларом и без, но кажется без находит реальные токены
         value = mint_address[1:].upper()
-        query = {
-            "query": find_ca_by_symbol_template.format(value=value),
-            "variables": "{}"
-        }
-        data = await fetch_bitquery(query)
 
-        data = data.get("data", {}).get("Solana", {}).get("TokenSupplyUpdates", [])
-        if data:
+        resolved = await token_index.resolve_symbol(value, find_currency_by_symbol)
+        if resolved:
             key = "MintAddress"
-            value = data[0]["TokenSupplyUpdate"]["Currency"]["MintAddress"]
+            value = resolved
 
     elif len(mint_address) <= 6 and " " not in mint_address:
         key = "Symbol"
         #value = f"${mint_address}"
         value = mint_address.upper()
 
-        query = {
-            "query": find_ca_by_symbol_template.format(value=value),
-            "variables": "{}"
-        }
-        data = await fetch_bitquery(query)
-
-        data = data.get("data", {}).get("Solana", {}).get("TokenSupplyUpdates", [])
-        if data:
+        resolved = await token_index.resolve_symbol(value, find_currency_by_symbol)
+        if resolved:
             key = "MintAddress"
-            value = data[0]["TokenSupplyUpdate"]["Currency"]["MintAddress"]
+            value = resolved
 
     elif " " in mint_address or mint_address.isalpha():
         key = "Name"
         value = mint_address
+
+        resolved = await token_index.resolve_name(value)
+        if resolved:
+            key = "MintAddress"
+            value = resolved
     else:
         key = "MintAddress"
         value = mint_address
-    return key, value
\ No newline at end of file
+    return key, value
@@ -1,16 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, literal, tuple_
 from sqlalchemy.future import select
-from src.db.session import get_async_db
+from starlette.responses import StreamingResponse
+from src.config import settings
+from src.db.session import AsyncSessionLocal, dialect_insert, get_async_db
 from src.models.user import User
 from src.models.chat import Chat
 from src.models.chat_history import ChatHistory
 from src.schemas.user import UserCreate, UserResponse
 from src.schemas.chat import ChatResponse, ChatCreateUpdate, ChatHistoryResponse
 from src.utils.logger import log_exceptions, logger
-from src.utils.summarizer import generate_chat_name
+from src.utils.chat_naming import PLACEHOLDER_NAME, chat_namer
 
-from typing import List
+from typing import List, Optional, Tuple
 
 router = APIRouter(prefix="/user", tags=["users"])
 
@@ -55,43 +62,40 @@ async def login_user(wallet_id: str, db: AsyncSession = Depends(get_async_db)):
 async def create_or_update_chat(chat_data: ChatCreateUpdate, wallet_id: str, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Creating or updating chat for wallet_id: {wallet_id}")
 
-    result = await db.execute(select(Chat).filter(Chat.uuid == chat_data.uuid))
-    db_chat = result.scalars().first()
-
-    if not db_chat:
-        logger.info(f"Chat not found with chat_uuid: {chat_data.uuid}, creating new")
-        result = await db.execute(select(User).filter(User.wallet_id == wallet_id))
-        db_user = result.scalars().first()
-        if not db_user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Генерируем название чата на основе первых сообщений
-        chat_name = await generate_chat_name(chat_data.question, chat_data.answer)
-        
-        db_chat = Chat(
-            uuid=chat_data.uuid,
-            name=chat_name or "New Chat",  # Используем сгенерированное имя вместо переданного
-            wallet_id=wallet_id
-        )
-        db.add(db_chat)
-        await db.commit()
-        await db.refresh(db_chat)
-    else:
-        # Если чат уже существует и name передан, обновляем его
-        if chat_data.name is not None:
-            db_chat.name = chat_data.name
-            db.add(db_chat)
-            await db.commit()
-            await db.refresh(db_chat)
-
-    new_question = ChatHistory(chat_id=db_chat.id, message=chat_data.question)
-    new_answer = ChatHistory(chat_id=db_chat.id, message=chat_data.answer)
-    db.add_all([new_question, new_answer])
+    # Чат и сообщения пишутся в одной транзакции, один коммит на ход.
+    # Новый чат всегда создается с заглушкой, название генерируется по первым сообщениям (переданное name не используется).
+    # Строка чата вставляется из SELECT по пользователю: без пользователя вставлять нечего и RETURNING пуст
+    insert_chat = dialect_insert(Chat).from_select(
+        [Chat.uuid, Chat.name, Chat.name_pending, Chat.wallet_id],
+        select(
+            literal(chat_data.uuid), literal(PLACEHOLDER_NAME), literal(True), User.wallet_id
+        ).filter(User.wallet_id == wallet_id),
+    )
+    insert_chat = insert_chat.on_conflict_do_update(
+        index_elements=[Chat.uuid],
+        # Если чат уже существует и name передан, обновляем его, сгенерированное имя больше не нужно
+        set_={"name": chat_data.name, "name_pending": False} if chat_data.name is not None else {"name": Chat.name},
+    ).returning(Chat.id, Chat.name, Chat.name_pending)
+    row = (await db.execute(insert_chat)).one_or_none()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
+    chat_id, chat_name, name_pending = row
+
+    await db.execute(insert(ChatHistory).values([
+        {"chat_id": chat_id, "message": chat_data.question},
+        {"chat_id": chat_id, "message": chat_data.answer},
+    ]))
     await db.commit()
 
+    # Название генерируется в фоне по первым сообщениям, клиент получит его из get_chats
+    if name_pending:
+        chat_namer.enqueue(chat_data.uuid, chat_data.question, chat_data.answer)
+
     return {
         "status": "ok",
-        "chat_name": db_chat.name
+        "chat_name": chat_name,
+        "name_pending": name_pending,
     }
 
 
@@ -107,28 +111,87 @@ async def get_chats(wallet_id: str, db: AsyncSession = Depends(get_async_db)):
     return db_chats
 
 
+def history_cursor(row) -> str:
+    """Keyset cursor of history row, passed back as `before`"""
+    return f"{row.timestamp.isoformat()}_{row.id}"
+
+
+def parse_history_cursor(before: str) -> Tuple[datetime, int]:
+    try:
+        timestamp, row_id = before.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def history_query(chat_id: int, before: Optional[str], descending: bool):
+    query = select(ChatHistory.id, ChatHistory.message, ChatHistory.timestamp).filter(ChatHistory.chat_id == chat_id)
+    if before is not None:
+        query = query.filter(tuple_(ChatHistory.timestamp, ChatHistory.id) < tuple_(*parse_history_cursor(before)))
+    if descending:
+        return query.order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+    return query.order_by(ChatHistory.timestamp, ChatHistory.id)
+
+
+def history_pair(question, answer) -> dict:
+    return {
+        "question": question.message,
+        "answer": answer.message,
+        "timestamp": answer.timestamp,
+        "cursor": history_cursor(question),
+    }
+
+
+async def stream_history(chat_id: int, before: Optional[str], limit: Optional[int]):
+    """NDJSON pairs in chronological order, rows are read from db cursor one by one"""
+    # Своя сессия: сессия из Depends закрывается раньше, чем отдается StreamingResponse
+    async with AsyncSessionLocal() as db:
+        if limit is not None:
+            # Последние limit пар, в памяти не больше 2 * limit строк
+            rows = (await db.execute(history_query(chat_id, before, descending=True).limit(limit * 2))).all()[::-1]
+            pairs = zip(rows[0::2], rows[1::2])
+            for question, answer in pairs:
+                yield json.dumps(jsonable_encoder(history_pair(question, answer))) + "\n"
+            return
+
+        question = None
+        async for row in await db.stream(history_query(chat_id, before, descending=False)):
+            if question is None:
+                question = row
+                continue
+            yield json.dumps(jsonable_encoder(history_pair(question, row))) + "\n"
+            question = None
+
+
 @router.get("/chats/{uuid}", response_model=List[ChatHistoryResponse])
 @log_exceptions
-async def get_chat_history(uuid: str, db: AsyncSession = Depends(get_async_db)):
+async def get_chat_history(
+    uuid: str,
+    limit: Optional[int] = Query(default=None, ge=1, le=settings.CHAT_HISTORY_PAGE_MAX, description="Number of latest question/answer pairs"),
+    before: Optional[str] = Query(default=None, description="Return pairs older than this cursor (cursor field of a pair)"),
+    stream: bool = Query(default=False, description="Stream pairs as NDJSON"),
+    db: AsyncSession = Depends(get_async_db),
+):
     logger.info(f"Fetching chat history for chat {uuid}")
 
-    result = await db.execute(select(Chat).filter(Chat.uuid == uuid))
-    db_chat = result.scalars().first()
-    if not db_chat:
+    result = await db.execute(select(Chat.id).filter(Chat.uuid == uuid))
+    chat_id = result.scalar()
+    if chat_id is None:
         logger.warning(f"Chat {uuid} not found")
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    result = await db.execute(
-        select(ChatHistory).filter(ChatHistory.chat_id == db_chat.id).order_by(ChatHistory.timestamp))
-    history = result.scalars().all()
+    if before is not None:
+        parse_history_cursor(before)  # 400 до начала потока, а не обрыв посреди ответа
+    if stream:
+        return StreamingResponse(stream_history(chat_id, before, limit), media_type="application/x-ndjson")
+
+    if limit is not None:
+        # Keyset пагинация: берем последние limit пар старше before и разворачиваем в хронологический порядок
+        result = await db.execute(history_query(chat_id, before, descending=True).limit(limit * 2))
+        history = result.all()[::-1]
+    else:
+        result = await db.execute(history_query(chat_id, before, descending=False))
+        history = result.all()
 
     logger.info(f"Chat history for {uuid}: {len(history)} messages")
-    response = []
-    for i in range(0, len(history), 2):
-        if i + 1 < len(history):
-            response.append({
-                "question": history[i].message,
-                "answer": history[i + 1].message,
-                "timestamp": history[i + 1].timestamp,
-            })
-    return response
\ No newline at end of file
+    return [history_pair(question, answer) for question, answer in zip(history[0::2], history[1::2])]
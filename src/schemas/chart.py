@@ -39,4 +39,8 @@ class TokenInfo(BaseModel):
 
 
 class ChartResponse(BaseModel):
-    data: Dict[str, Union[List[ChartData], TokenInfo]]
\ No newline at end of file
+    data: Dict[str, Union[List[ChartData], TokenInfo]]
+
+
+class ChartBatchResponse(BaseModel):
+    data: Dict[str, Dict[str, Union[List[ChartData], TokenInfo]]]
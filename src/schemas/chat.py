@@ -9,6 +9,7 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     messages: List[ChatMessage] = Field(description="List of messages in current chat")
+    chat_uuid: Optional[str] = Field(default=None, description="uuid of the chat, used to cache summary of long history")
 
 class ToolResponse(BaseModel):
     type: Literal["chart-and-stats", "stats-volume", "token-top", "swap", "top-traders", "top-holders", "tokens-holded-by-wallet", "backend"]
@@ -43,6 +44,7 @@ class ChatHistoryResponse(BaseModel):
     question: str = Field(description="Question from user")
     answer: str = Field(description="Answer from model")
     timestamp: datetime
+    cursor: Optional[str] = Field(default=None, description="Pass as `before` to get older pairs")
 
     class Config:
         orm_mode = True
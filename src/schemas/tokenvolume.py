@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class TokenVolumeResponse(BaseModel):
@@ -18,4 +18,8 @@ class TokenVolumeResponse(BaseModel):
     sellPercentage: float
     holdersCount: int
     marketCap: float
-    marketCapInUSD: float
\ No newline at end of file
+    marketCapInUSD: float
+
+
+class TokenVolumeBatchResponse(BaseModel):
+    data: Dict[str, TokenVolumeResponse]
@@ -0,0 +1,22 @@
+from typing import Collection
+
+from langchain_core.agents import AgentFinish
+from langchain_core.runnables import Runnable, RunnableBranch, RunnableLambda
+
+
+def stop_after_widgets(agent: Runnable, widget_tools: Collection[str]) -> Runnable:
+    """Agent which finishes the run right after widget tools, without a second model call.
+
+    Used instead of tool return_direct: the run stops only if every tool
+    called so far (intermediate_steps passed in by AgentExecutor) is a
+    widget, after a search the model still writes its answer. Output of the
+    run is the observation of the last widget call.
+    """
+    def widgets_only(inputs: dict) -> bool:
+        steps = inputs.get("intermediate_steps") or []
+        return bool(steps) and all(action.tool in widget_tools for action, _ in steps)
+
+    def finish(inputs: dict) -> AgentFinish:
+        return AgentFinish({"output": inputs["intermediate_steps"][-1][1]}, "")
+
+    return RunnableBranch((widgets_only, RunnableLambda(finish)), agent)
@@ -0,0 +1,306 @@
+import json
+import time
+import asyncio
+
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.logger import logger
+
+# Общий клиент redis, создается в startup_event вместе с FastAPILimiter
+_redis: Optional[aioredis.Redis] = None
+
+
+def set_redis(redis: aioredis.Redis) -> None:
+    global _redis
+    _redis = redis
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    return _redis
+
+
+class LRUCache:
+    """In-process LRU with optional per-entry ttl (seconds)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """In-process LRU backed by shared redis, values must be json serializable.
+
+    Redis failures are logged and the cache keeps working in local-only mode.
+    """
+
+    def __init__(self, namespace: str, maxsize: int):
+        self.namespace = namespace
+        self.local = LRUCache(maxsize)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        metrics.register_source(f"cache.{namespace}", self.stats)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._key(key))
+                if raw is not None:
+                    ttl = await redis.ttl(self._key(key))
+                    value = json.loads(raw)
+                    self.local.set(key, value, ttl if ttl > 0 else None)
+                    self.redis_hits += 1
+                    return value
+            except RedisError as e:
+                logger.warning(f"Redis get failed for {self._key(key)}: {e}")
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store value in both tiers, without ttl the entry never expires"""
+        self.local.set(key, value, ttl)
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self._key(key), json.dumps(value), ex=ttl)
+            except RedisError as e:
+                logger.warning(f"Redis set failed for {self._key(key)}: {e}")
+
+    def stats(self) -> dict:
+        total = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self.local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.redis_hits) / total if total else 0,
+        }
+
+
+class ResponseCache:
+    """Redis-backed cache of endpoint responses.
+
+    Entries are served fresh for `ttl` seconds and stale for another
+    settings.RESPONSE_CACHE_STALE_TTL seconds while one background refresh
+    is running (stale-while-revalidate). Concurrent misses for the same key
+    are coalesced into one upstream call: in-process via shared task and
+    across workers via redis lock (single-flight).
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        metrics.register_source(f"cache.{namespace}", self.stats)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _load(self, key: str) -> Optional[dict]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._key(key))
+        except RedisError as e:
+            logger.warning(f"Redis get failed for {self._key(key)}: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def _store(self, key: str, value: Any, ttl: int) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        entry = {"value": value, "expires_at": time.time() + ttl}
+        try:
+            await redis.set(self._key(key), json.dumps(entry), ex=ttl + settings.RESPONSE_CACHE_STALE_TTL)
+        except RedisError as e:
+            logger.warning(f"Redis set failed for {self._key(key)}: {e}")
+
+    async def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        redis = get_redis()
+        lock_key = self._key(f"lock:{key}")
+        locked = False
+        if redis is not None:
+            try:
+                locked = await redis.set(lock_key, "1", nx=True, ex=settings.RESPONSE_CACHE_LOCK_TTL)
+                if not locked:
+                    # Другой воркер уже пошел в апстрим, ждем его результат
+                    deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TTL
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(0.1)
+                        entry = await self._load(key)
+                        if entry is not None and entry["expires_at"] > time.time():
+                            self.coalesced += 1
+                            return entry["value"]
+            except RedisError as e:
+                logger.warning(f"Redis lock failed for {lock_key}: {e}")
+
+        try:
+            value = await fetch()
+            await self._store(key, value, ttl)
+            return value
+        finally:
+            if locked:
+                try:
+                    await redis.delete(lock_key)
+                except RedisError as e:
+                    logger.warning(f"Redis unlock failed for {lock_key}: {e}")
+
+    def _single_flight(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: int) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, fetch, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return task
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        entry = await self._load(key)
+        if entry is not None:
+            if entry["expires_at"] > time.time():
+                self.hits += 1
+                return entry["value"]
+
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self._single_flight(key, fetch, ttl).add_done_callback(self._log_refresh_error)
+            return entry["value"]
+
+        self.misses += 1
+        return await asyncio.shield(self._single_flight(key, fetch, ttl))
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh failed in {self.namespace}: {task.exception()}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.stale_hits) / total if total else 0,
+        }
+
+
+def cache_response(cache: ResponseCache, endpoint: str, ttl: Callable[[dict], int]):
+    """Decorator for route handlers, caches result by endpoint and normalized query params"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**kwargs):
+            params = "&".join(f"{name}={str(value).strip()}" for name, value in sorted(kwargs.items()))
+            return await cache.get_or_fetch(f"{endpoint}?{params}", lambda: func(**kwargs), ttl(kwargs))
+        return wrapper
+    return decorator
+
+
+class StreamCache:
+    """Redis cache of complete streamed answers (list of chunks) with LRU eviction.
+
+    Entries are plain redis keys with ttl, access time of every entry is kept in
+    sorted set `{namespace}:lru`; when it grows over settings.AGENT_CACHE_MAX_ENTRIES
+    the least recently used entries are deleted. Streams larger than
+    settings.AGENT_CACHE_MAX_ENTRY_BYTES are not stored.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.too_large = 0
+        metrics.register_source(f"cache.{namespace}", self.stats)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[List[str]]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._key(key))
+            if raw is None:
+                self.misses += 1
+                return None
+            await redis.zadd(self._key("lru"), {key: time.time()})
+        except RedisError as e:
+            logger.warning(f"Redis get failed for {self._key(key)}: {e}")
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, chunks: List[str]) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        raw = json.dumps(chunks)
+        if len(raw.encode()) > settings.AGENT_CACHE_MAX_ENTRY_BYTES:
+            self.too_large += 1
+            return
+        try:
+            await redis.set(self._key(key), raw, ex=settings.AGENT_CACHE_TTL)
+            await redis.zadd(self._key("lru"), {key: time.time()})
+
+            overflow = await redis.zcard(self._key("lru")) - settings.AGENT_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                evicted = [item for item, _ in await redis.zpopmin(self._key("lru"), overflow)]
+                await redis.delete(*[self._key(item) for item in evicted])
+        except RedisError as e:
+            logger.warning(f"Redis set failed for {self._key(key)}: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "too_large": self.too_large,
+            "hit_rate": self.hits / total if total else 0,
+        }
@@ -0,0 +1,89 @@
+import os
+import re
+import json
+import time
+
+from typing import Dict, Optional
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.logger import logger
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s$]", " ", prompt.lower()).split())
+
+
+class CannedAnswers:
+    """Mock answers and FAQ answers by normalized prompt.
+
+    `base` (MOCK_CHATS_CONFIG) keeps its demo marker: it answers only prompts
+    starting with two spaces. FAQ entries from optional json file
+    settings.CANNED_ANSWERS_PATH ({"prompt": "answer"}) answer any prompt.
+    Both are matched by normalized prompt. The file is re-read when its mtime
+    changes, checked at most every settings.CANNED_ANSWERS_RELOAD seconds, so
+    workers pick up new answers without restart.
+    """
+
+    def __init__(self, base: Dict[str, str]):
+        self.base = base
+        self._mock_index = {normalize_prompt(prompt): answer for prompt, answer in base.items()}
+        self._index: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        metrics.register_source("canned_answers", self.stats)
+
+    def load(self) -> None:
+        """Rebuild FAQ index from answers file"""
+        answers = {}
+        path = settings.CANNED_ANSWERS_PATH
+        if path:
+            try:
+                mtime = os.stat(path).st_mtime
+                with open(path, encoding="utf-8") as f:
+                    answers.update(json.load(f))
+                # mtime запоминаем только после успешного разбора, битый файл перечитаем на следующей проверке
+                self._mtime = mtime
+            except FileNotFoundError:
+                self._mtime = None
+            except (OSError, ValueError) as e:
+                # Битый файл не должен ронять воркер, оставляем предыдущий индекс
+                self._checked_at = time.monotonic()
+                logger.warning(f"Canned answers reload from {path} failed: {e}")
+                return
+
+        self._index = {normalize_prompt(prompt): answer for prompt, answer in answers.items()}
+        self._checked_at = time.monotonic()
+        logger.info(f"Canned answers index built with {len(self._index)} prompts")
+
+    def _reload_if_changed(self) -> None:
+        path = settings.CANNED_ANSWERS_PATH
+        if not path or time.monotonic() - self._checked_at < settings.CANNED_ANSWERS_RELOAD:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.load()
+
+    def match(self, prompt: str) -> Optional[str]:
+        """Canned answer for prompt or None"""
+        self._reload_if_changed()
+        normalized = normalize_prompt(prompt)
+        # Демо ответы отдаем только по маркеру из двух пробелов
+        answer = self._mock_index.get(normalized) if prompt.startswith("  ") else None
+        if answer is None:
+            answer = self._index.get(normalized)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def stats(self) -> dict:
+        return {"size": len(self._index), "mock_size": len(self.base), "hits": self.hits, "misses": self.misses}
@@ -1,11 +1,16 @@
+import re
 import json
+import time
+import uuid
+import hashlib
 import logging
-import asyncio
 
-from time import sleep
-from typing import Optional, Literal
-from langchain import hub
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, Optional, Literal, Tuple
 from fastapi import Request
+from langchain_core.load import loads
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import Tool, StructuredTool
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_tool_calling_agent
@@ -21,6 +26,15 @@ from src.pasta import (
 from src.mock_chats_config import MOCK_CHATS_CONFIG
 from src.config import settings
 from src.schemas.chat import ChatMessage, ToolResponse, TokenSwapModel, ToolRequestWithTokenAndTimeframe
+from src.utils import metrics
+from src.utils.agent_steps import stop_after_widgets
+from src.utils.cache import StreamCache
+from src.utils.canned import CannedAnswers
+from src.utils.history import window_history
+from src.utils.intent_router import RESEARCH_PATTERN, intent_router
+from src.utils.logger import logger
+from src.utils.streaming import pace, word_chunks
+from src.utils.usage import record_usage, token_usage
 from src.utils.websearch import perplexity_search, deep_research_twitter, web_deep_search
 
 
@@ -188,8 +202,23 @@ async def swap_tokens(
     )
 
 
-async def create_agent():
-    tools = [
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+# Инструменты, которые intent_router вызывает напрямую, минуя агента
+DIRECT_TOOLS = {
+    "TokenBalanceAndTokens": tokens_holded_by_wallet,
+    "TopPumpFunTokensByMarketCap": top_pump_fun_tokens_by_market_cap,
+    "TopTrendingTokens": top_trending_tokens,
+    "ChartDetailsAndStats": chart_details_and_stats,
+    "TopTokenTraders": top_token_traders,
+    "TopTokenHolders": top_token_holders,
+    "TokenSwap": swap_tokens,
+}
+
+
+def build_tools() -> list:
+    """Agent tools, built once and shared by all executors in agent_pool"""
+    return [
         Tool(
             name="PerplexitySearch",
             func=perplexity_search,
@@ -262,26 +291,84 @@ async def create_agent():
             args_schema=TokenSwapModel
         ),
     ]
-    llm = ChatOpenAI(
-        temperature=settings.TEMPERATURE, 
-        model=settings.MODEL, 
-        streaming=settings.STREAMING
-    )
-    prompt = hub.pull("hwchase17/openai-tools-agent")
-    agent = create_tool_calling_agent(llm, tools, prompt)
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
-    return agent_executor
 
 
-def get_agent(request: Request) -> AgentExecutor:
-    agent = request.app.state.agent
-    if asyncio.iscoroutine(agent):
-        raise RuntimeError("Agent was not properly initialized. Please check the startup event.")
-    return agent
+@lru_cache(maxsize=None)
+def load_prompt(name: str, version: int) -> ChatPromptTemplate:
+    """Agent prompt vendored in src/prompts/<hub name>/v<version>.json instead of hub.pull"""
+    path = PROMPTS_DIR / name / f"v{version}.json"
+    return loads(path.read_text(encoding="utf-8"), allowed_objects="core")
 
 
-async def stream_response(agent_executor: AgentExecutor, messages: list[ChatMessage]):
-    tools_used_num = 0
+class AgentPool:
+    """Pre-built AgentExecutor per (model, temperature), created once per worker.
+
+    Executors are stateless between runs, so one instance serves all
+    concurrent requests of its configuration. Tools and prompt are shared.
+    """
+
+    def __init__(self):
+        self._tools: Optional[list] = None
+        self._executors: Dict[Tuple[str, float], AgentExecutor] = {}
+
+    def _build(self, model: str, temperature: float) -> AgentExecutor:
+        if self._tools is None:
+            self._tools = build_tools()
+        llm = ChatOpenAI(
+            temperature=temperature, 
+            model=model, 
+            streaming=settings.STREAMING,
+            stream_usage=True,
+        )
+        prompt = load_prompt(settings.PROMPT, settings.PROMPT_VERSION)
+        agent = stop_after_widgets(create_tool_calling_agent(llm, self._tools, prompt), DIRECT_TOOLS)
+        return AgentExecutor(
+            agent=agent,
+            tools=self._tools,
+            verbose=True,
+            metadata={"model": model, "temperature": temperature},
+        )
+
+    def warm(self) -> None:
+        """Build executors for default model, model tiers and settings.AGENT_POOL_CONFIGS"""
+        self.get()
+        for model in settings.MODEL_TIERS.values():
+            self.get(model)
+        for config in settings.AGENT_POOL_CONFIGS:
+            self.get(config["model"], config.get("temperature"))
+        logger.info(f"Agent pool warmed with {len(self._executors)} executors")
+
+    def get(self, model: Optional[str] = None, temperature: Optional[float] = None) -> AgentExecutor:
+        """Executor for configuration, defaults are settings.MODEL and settings.TEMPERATURE"""
+        key = (model or settings.MODEL, settings.TEMPERATURE if temperature is None else temperature)
+        executor = self._executors.get(key)
+        if executor is None:
+            executor = self._executors[key] = self._build(*key)
+        return executor
+
+
+agent_pool = AgentPool()
+
+
+def get_agents(request: Request) -> AgentPool:
+    return request.app.state.agents
+
+
+# Признаки запроса на виджет, где модель только извлекает аргументы
+WIDGET_PATTERN = re.compile(
+    r"\b(chart|price|holders?|traders?|balance|wallet|swap|trending|top|pump\.?fun)\b|\$[A-Za-z]|[1-9A-HJ-NP-Za-km-z]{32,44}",
+    re.IGNORECASE,
+)
+
+
+def classify_tier(input_text: str) -> str:
+    """Model tier for request: "fast" for tool-only intents, "smart" for everything else"""
+    if len(input_text.split()) > settings.MODEL_FAST_MAX_WORDS or RESEARCH_PATTERN.search(input_text):
+        return "smart"
+    return "fast" if WIDGET_PATTERN.search(input_text) else "smart"
+
+
+async def stream_response(agents: AgentPool, messages: list[ChatMessage], chat_uuid: Optional[str] = None):
     input_message = messages[-1] if messages else None
     chat_history = messages[:-1]
 
@@ -289,15 +376,76 @@ async def stream_response(agent_executor: AgentExecutor, messages: list[ChatMess
         raise ValueError("Messages list is empty. Cannot process the request.")
     
     input_text = input_message.content
-    if input_text.startswith("  "):
-        response = mock_responses(input_text)
+    response = canned_answers.match(input_text)
+    if response:
+        async for chunk in pace(word_chunks(response)):
+            yield chunk
+        return
+
+    routed = intent_router.route(input_text)
+    if routed is not None:
+        async for chunk in direct_tool_events(*routed):
+            yield chunk
+        return
 
-        if response:
-            for word in word_generator(response):
-                yield word
-            return
+    tier = classify_tier(input_text) if settings.MODEL_ROUTING else "default"
+    agent_executor = agents.get(settings.MODEL_TIERS.get(tier))
 
     history = [{"role": msg.role, "content": msg.content} for msg in chat_history]
+    key = stream_cache_key(agent_executor, input_text, history)
+    cached = await stream_cache.get(key)
+    if cached is not None:
+        async for chunk in pace(cached, rate=settings.AGENT_CACHE_REPLAY_RATE):
+            yield chunk
+        return
+
+    # Ключ кэша считается по полной истории, в агента идет окно с саммари старых сообщений
+    history = await window_history(history, chat_uuid)
+
+    # Сохраняем поток только если он дошел до конца (не было ошибки или разрыва клиента)
+    chunks = []
+    start_time = time.perf_counter()
+    metrics.incr(f"model_tier.{tier}.requests")
+    async for chunk in agent_events(agent_executor, input_text, history, tier):
+        if not chunks:
+            metrics.incr(f"model_tier.{tier}.first_chunk_seconds", time.perf_counter() - start_time)
+        chunks.append(chunk)
+        yield chunk
+    metrics.incr(f"model_tier.{tier}.seconds", time.perf_counter() - start_time)
+    await stream_cache.set(key, chunks)
+
+
+def stream_cache_key(agent_executor: AgentExecutor, input_text: str, history: list[dict]) -> str:
+    """Hash of everything that defines agent answer: model, prompt and conversation"""
+    conversation = json.dumps(
+        [agent_executor.metadata, settings.PROMPT, settings.PROMPT_VERSION, history, input_text],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(conversation.encode()).hexdigest()
+
+
+async def direct_tool_events(tool_name: str, tool_input: dict):
+    """Same frames as agent_events for tool called without agent"""
+    output = await DIRECT_TOOLS[tool_name](**tool_input)
+    event = {
+        "event": "on_tool_end",
+        "name": tool_name,
+        "run_id": str(uuid.uuid4()),
+        "tags": [],
+        "metadata": {},
+        "data": {"input": tool_input, "output": output.dict()},
+    }
+    yield json.dumps(event) + "\n"
+    if output.response:
+        yield output.response
+
+
+async def agent_events(agent_executor: AgentExecutor, input_text: str, history: list[dict], tier: str):
+    """Text chunks and tool-end json frames of one agent run, token usage is counted per tier"""
+    tools_used_num = 0
+    text_yielded = False
+    # Заготовленные ответы виджетов, отдаем только если модель сама ничего не написала
+    widget_responses = []
     async for event in agent_executor.astream_events(
         {"input": input_text, "chat_history": history},
         version="v1",
@@ -306,7 +454,10 @@ async def stream_response(agent_executor: AgentExecutor, messages: list[ChatMess
         if kind == "on_chat_model_stream":
             content = event["data"]["chunk"].content
             if content:
+                text_yielded = True
                 yield content
+        elif kind == "on_chat_model_end":
+            record_usage(tier, agent_executor.metadata["model"], token_usage(event["data"].get("output")))
         elif kind == "on_tool_start" and "input" in event["data"]:
             # Пропускаем начало выполнения инструментов
             continue
@@ -325,14 +476,15 @@ async def stream_response(agent_executor: AgentExecutor, messages: list[ChatMess
                         event["data"]["output"] = output_data.dict()
                         tools_used_num += 1
                         yield json.dumps(event) + "\n"
-            
+                        if isinstance(output_data, ToolResponse) and output_data.response:
+                            widget_responses.append(output_data.response)
+
+    # Прогон остановился на виджетах (stop_after_widgets) без второго вызова модели,
+    # поэтому заготовленный текст ответа отдаем сами
+    if not text_yielded:
+        for response in widget_responses:
+            yield response
 
-def mock_responses(input_message: str) -> Optional[str]:
-    return MOCK_CHATS_CONFIG.get(input_message, None)
-    
 
-def word_generator(input_string):
-    words = input_string.split()
-    for word in words:
-        sleep(0.05)
-        yield word + " "
+canned_answers = CannedAnswers(MOCK_CHATS_CONFIG)
+stream_cache = StreamCache("agent_stream")
@@ -0,0 +1,101 @@
+import asyncio
+
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import update
+
+from src.config import settings
+from src.db.session import AsyncSessionLocal
+from src.models.chat import Chat
+from src.utils import metrics
+from src.utils.logger import logger
+from src.utils.summarizer import generate_chat_name
+
+# Имя нового чата, пока фоновая задача не сгенерировала настоящее
+PLACEHOLDER_NAME = "New Chat"
+
+
+class ChatNamer:
+    """In-process queue generating chat names in background with retries.
+
+    Chats are inserted with PLACEHOLDER_NAME and name_pending set, the
+    generated name is written only while the flag is still set (user rename
+    clears it and wins). Clients
+    pick the name up from get_chats. Queue is per worker and is lost on
+    restart, chats left with the placeholder are enqueued again on their
+    next message.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self.named = 0
+        self.retries = 0
+        self.failed = 0
+        metrics.register_source("chat_naming", self.stats)
+
+    def start(self) -> None:
+        """Starts workers, called in app startup"""
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(settings.CHAT_NAMING_WORKERS)]
+
+    async def stop(self) -> None:
+        """Cancels workers, called in app shutdown"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, chat_uuid: str, question: str, answer: str) -> bool:
+        """Schedule naming of chat, returns False if it is already queued"""
+        if self._queue is None or chat_uuid in self._pending:
+            return False
+        self._pending.add(chat_uuid)
+        self._queue.put_nowait((chat_uuid, question, answer))
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job: Tuple[str, str, str] = await self._queue.get()
+            try:
+                await self._name(*job)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Chat naming failed for {job[0]}: {e}")
+            finally:
+                self._pending.discard(job[0])
+                self._queue.task_done()
+
+    async def _name(self, chat_uuid: str, question: str, answer: str) -> None:
+        for attempt in range(settings.CHAT_NAMING_RETRIES + 1):
+            try:
+                name = await generate_chat_name(question, answer)
+                break
+            except Exception as e:
+                if attempt == settings.CHAT_NAMING_RETRIES:
+                    self.failed += 1
+                    logger.warning(f"Chat name generation failed for {chat_uuid}: {e}")
+                    return
+                self.retries += 1
+                await asyncio.sleep(settings.CHAT_NAMING_BACKOFF * 2 ** attempt)
+
+        if not name:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Chat).where(Chat.uuid == chat_uuid, Chat.name_pending).values(name=name, name_pending=False)
+            )
+            await db.commit()
+        self.named += 1
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "named": self.named,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+
+chat_namer = ChatNamer()
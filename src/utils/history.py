@@ -0,0 +1,120 @@
+import json
+import asyncio
+import hashlib
+
+from typing import Dict, Optional, Tuple
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.cache import TwoTierCache
+from src.utils.logger import logger
+from src.utils.summarizer import summarize_history
+
+history_summaries = TwoTierCache("history_summary", maxsize=settings.CHAT_SUMMARY_CACHE_SIZE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+def _digest(messages: list[dict]) -> str:
+    return hashlib.sha256(json.dumps(messages, ensure_ascii=False).encode()).hexdigest()
+
+
+# Фоновые сворачивания истории по ключу саммари, чтобы не запускать два на один чат
+_folding: Dict[str, asyncio.Task] = {}
+
+
+def _summary_key(older: list[dict], chat_uuid: Optional[str]) -> str:
+    # Без uuid разные чаты не различить, саммари переиспользуется только для той же самой истории
+    return chat_uuid or _digest(older)
+
+
+async def _cached_summary(key: str, older: list[dict]) -> Tuple[str, int]:
+    """Cached summary and number of `older` messages folded into it, ("", 0) if none is usable"""
+    cached = await history_summaries.get(key)
+    if cached is not None and cached["count"] <= len(older) and cached["digest"] == _digest(older[:cached["count"]]):
+        return cached["summary"], cached["count"]
+    return "", 0
+
+
+async def _fold(key: str, older: list[dict]) -> str:
+    """Fold messages of `older` not covered by the cached summary into it"""
+    summary, folded = await _cached_summary(key, older)
+    if folded == len(older):
+        return summary
+
+    summary = await summarize_history(summary, older[folded:])
+    metrics.incr("history.summaries")
+    metrics.incr("history.folded_messages", len(older) - folded)
+    await history_summaries.set(
+        key,
+        {"count": len(older), "digest": _digest(older), "summary": summary},
+        settings.CHAT_SUMMARY_TTL,
+    )
+    return summary
+
+
+async def _fold_now(key: str, older: list[dict]) -> str:
+    # Если фоновое сворачивание уже идет, дожидаемся его и досворачиваем остаток
+    task = _folding.get(key)
+    if task is not None:
+        await asyncio.wait([task])
+    return await _fold(key, older)
+
+
+def _log_fold_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Chat history summarization failed: {task.exception()}")
+
+
+def _schedule_fold(key: str, older: list[dict]) -> None:
+    if key in _folding:
+        return
+    task = asyncio.create_task(_fold(key, older))
+    _folding[key] = task
+    task.add_done_callback(lambda _: _folding.pop(key, None))
+    task.add_done_callback(_log_fold_error)
+
+
+async def window_history(history: list[dict], chat_uuid: Optional[str] = None) -> list[dict]:
+    """
+    Chat history for the agent: last settings.CHAT_HISTORY_TURNS turns verbatim
+    within settings.CHAT_HISTORY_TOKEN_BUDGET, older messages folded into one
+    summary message. Summary is cached per chat uuid (or per exact history).
+
+    Messages the cached summary does not cover yet are sent verbatim while they
+    fit into settings.CHAT_SUMMARY_PENDING_BUDGET, and are folded in background
+    once settings.CHAT_SUMMARY_BATCH_TURNS turns piled up. Only when they do not
+    fit (first request of a long chat, background fold far behind) the request
+    waits for the summary, so no message is silently dropped.
+    """
+    recent = history[-settings.CHAT_HISTORY_TURNS * 2:] if settings.CHAT_HISTORY_TURNS else []
+
+    # Бюджет на дословную часть истории, самые старые сообщения уходят в саммари
+    tokens = sum(estimate_tokens(message["content"]) for message in recent)
+    while recent and tokens > settings.CHAT_HISTORY_TOKEN_BUDGET:
+        tokens -= estimate_tokens(recent[0]["content"])
+        recent = recent[1:]
+
+    older = history[:len(history) - len(recent)]
+    if not older:
+        return recent
+
+    key = _summary_key(older, chat_uuid)
+    try:
+        summary, folded = await _cached_summary(key, older)
+        pending = older[folded:]
+        if sum(estimate_tokens(message["content"]) for message in pending) > settings.CHAT_SUMMARY_PENDING_BUDGET:
+            summary, pending = await _fold_now(key, older), []
+        elif len(pending) >= settings.CHAT_SUMMARY_BATCH_TURNS * 2:
+            _schedule_fold(key, older)
+    except Exception as e:
+        logger.warning(f"Chat history summarization failed, older messages dropped: {e}")
+        return recent
+
+    window = pending + recent
+    if not summary:
+        return window
+    return [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] + window
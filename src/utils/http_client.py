@@ -0,0 +1,106 @@
+import time
+import httpx
+
+from importlib.util import find_spec
+from typing import Dict, Optional
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.logger import logger
+
+
+class UpstreamClient:
+    """Long-living httpx client for one upstream with pool saturation stats"""
+
+    def __init__(self, name: str, timeout: float, **kwargs):
+        self.name = name
+        self.max_connections = settings.HTTP_MAX_CONNECTIONS
+        self.http2 = settings.HTTP2 and find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            **kwargs,
+        )
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0  # запросы, которые ждали свободное соединение
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.in_flight >= self.max_connections:
+            self.saturated += 1
+        self.in_flight += 1
+        self.requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        start_time = time.perf_counter()
+        try:
+            return await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.perf_counter() - start_time
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "saturated": self.saturated,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_time": self.total_time / self.requests if self.requests else 0,
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# Параметры клиентов для каждого апстрима
+UPSTREAMS = {
+    "bitquery": {"timeout": 30.0},
+    "ipfs": {"timeout": 5.0, "follow_redirects": True},
+    "perplexity": {"timeout": 45.0},
+}
+
+_clients: Dict[str, UpstreamClient] = {}
+
+
+def get_client(name: str) -> UpstreamClient:
+    """Returns shared client for upstream, creates it on first use if startup was skipped"""
+    client: Optional[UpstreamClient] = _clients.get(name)
+    if client is None:
+        client = UpstreamClient(name, **UPSTREAMS[name])
+        _clients[name] = client
+    return client
+
+
+async def start_http_clients():
+    """Creates clients for all upstreams, called in app startup"""
+    for name in UPSTREAMS:
+        get_client(name)
+    metrics.register_source("http", lambda: {name: c.stats() for name, c in _clients.items()})
+    logger.info(f"HTTP clients started: {list(_clients)}")
+
+
+async def close_http_clients():
+    """Closes all clients, called in app shutdown"""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,103 @@
+import re
+
+from typing import Optional, Tuple
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.logger import logger
+
+MINT_ADDRESS = re.compile(r"(?<![1-9A-HJ-NP-Za-km-z])[1-9A-HJ-NP-Za-km-z]{32,44}(?![1-9A-HJ-NP-Za-km-z])")
+TICKER = re.compile(r"(?<!\w)\$[A-Za-z][A-Za-z0-9]{0,11}\b")
+SWAP = re.compile(r"^swap\s+(\$?[A-Za-z0-9]+)\s+(?:to|for|into|->)\s+(\$?[A-Za-z0-9]+)$", re.IGNORECASE)
+
+# Ключевые слова намерений -> имя инструмента агента, токен обязателен для всех кроме топов
+TOKEN_INTENTS = {
+    "ChartDetailsAndStats": re.compile(r"\b(chart|price|stats)\b", re.IGNORECASE),
+    "TopTokenHolders": re.compile(r"\bholders?\b", re.IGNORECASE),
+    "TopTokenTraders": re.compile(r"\btraders?\b", re.IGNORECASE),
+}
+WALLET_INTENT = re.compile(r"\b(balance|wallet|portfolio)\b", re.IGNORECASE)
+TRENDING_INTENT = re.compile(r"\btrending\b", re.IGNORECASE)
+PUMPFUN_INTENT = re.compile(r"\btop\b.*\bpump\.?fun\b|\bpump\.?fun\b.*\btop\b", re.IGNORECASE)
+
+# Признаки вопроса или анализа, такие сообщения идут в агента (и в smart тир, см. classify_tier)
+RESEARCH_PATTERN = re.compile(
+    r"\b(why|how|what|news|research|analy[sz]\w*|explain|opinion|sentiment|predict\w*|compare|should|twitter|think)\b",
+    re.IGNORECASE,
+)
+# Сравнение и отрицание: виджет по ключевому слову здесь был бы неверным ответом
+COMPARISON = re.compile(r"\b(vs|versus)\b", re.IGNORECASE)
+NEGATION = re.compile(r"\b(not|no|never|without|dont|don't|doesnt|doesn't)\b|n't\b", re.IGNORECASE)
+
+
+class IntentRouter:
+    """Rule based router for short widget requests.
+
+    Returns (tool name, tool kwargs) only when exactly one intent and one
+    token are recognized, otherwise None and the message goes to the agent.
+    Questions, analysis requests and negations always go to the agent.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        metrics.register_source("intent_router", self.stats)
+
+    @staticmethod
+    def _timeframe(words: list) -> Optional[str]:
+        timeframes = [word for word in words if word in settings.TIME_INTERVALS]
+        return timeframes[0] if len(timeframes) == 1 else None
+
+    def _match(self, text: str) -> Optional[Tuple[str, dict]]:
+        text = " ".join(text.split())
+        words = text.lower().split()
+        if not words or len(words) > settings.INTENT_ROUTER_MAX_WORDS:
+            return None
+        if text.endswith("?") or RESEARCH_PATTERN.search(text) or COMPARISON.search(text) or NEGATION.search(text):
+            return None
+
+        if swap := SWAP.match(text):
+            return "TokenSwap", {"swapA": swap.group(1), "swapB": swap.group(2)}
+
+        mints = MINT_ADDRESS.findall(text)
+        tickers = TICKER.findall(text)
+        tokens = mints + tickers
+        timeframe = self._timeframe(words)
+
+        intents = [name for name, pattern in TOKEN_INTENTS.items() if pattern.search(text)]
+        if WALLET_INTENT.search(text):
+            intents.append("TokenBalanceAndTokens")
+        if TRENDING_INTENT.search(text):
+            intents.append("TopTrendingTokens")
+        if PUMPFUN_INTENT.search(text):
+            intents.append("TopPumpFunTokensByMarketCap")
+        if len(intents) != 1:
+            return None
+        intent = intents[0]
+
+        if intent == "TopTrendingTokens":
+            return (intent, {"timeframe": timeframe}) if not tokens else None
+        if intent == "TopPumpFunTokensByMarketCap":
+            return (intent, {}) if not tokens else None
+        if len(tokens) != 1:
+            return None
+        if intent == "TokenBalanceAndTokens":
+            return (intent, {"mint_address": mints[0]}) if mints else None
+        return intent, {"token_ca": tokens[0], "timeframe": timeframe}
+
+    def route(self, text: str) -> Optional[Tuple[str, dict]]:
+        """Tool name and kwargs for message or None if agent is needed"""
+        routed = self._match(text)
+        if routed is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.info(f"Intent router: {routed[0]} {routed[1]}, hit rate {self.stats()['hit_rate']:.2f}")
+        return routed
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0}
+
+
+intent_router = IntentRouter()
@@ -0,0 +1,224 @@
+import time
+import asyncio
+import logging
+import httpx
+
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.cache import TwoTierCache
+from src.utils.http_client import get_client
+
+IPFS_GATEWAYS = ["https://dweb.link", "https://ipfs.io", "https://cf-ipfs.com"]
+
+
+metadata_cache = TwoTierCache("ipfs", maxsize=settings.IPFS_CACHE_SIZE)
+
+
+def extract_ipfs_hash(uri: str) -> Optional[str]:
+    """Extract CID from IPFS gateway URI, returns None for non IPFS uris"""
+    parsed_uri = urlparse(uri)
+
+    # Проверяем, является ли URL IPFS-шлюзом
+    for gateway in IPFS_GATEWAYS:
+        if parsed_uri.netloc in gateway:
+            ipfs_hash = parsed_uri.path.lstrip("/ipfs/")
+            if ipfs_hash:
+                return ipfs_hash
+            break
+
+    # Если не нашли в списке известных шлюзов, извлекаем хеш по умолчанию
+    path_parts = parsed_uri.path.split('/')
+    if "ipfs" in path_parts and path_parts.index("ipfs") + 1 < len(path_parts):
+        return path_parts[path_parts.index("ipfs") + 1] or None
+    return None
+
+
+async def fetch_ipfs_metadata(uri: str) -> Optional[Dict]:
+    """Retrieve tokens metadata by IPFS URI, cached by IPFS hash.
+
+    Content behind a CID is immutable, so found metadata is cached for
+    settings.IPFS_CACHE_TTL seconds (long, but bounded: redis is shared with
+    the rate limiter), empty results for settings.IPFS_NEGATIVE_TTL seconds.
+    """
+    ipfs_hash = extract_ipfs_hash(uri)
+    if ipfs_hash:
+        metadata = await metadata_cache.get(ipfs_hash)
+        if metadata is not None:
+            return metadata
+
+    metadata = await _fetch_ipfs_metadata(uri, ipfs_hash)
+
+    if ipfs_hash:
+        await metadata_cache.set(ipfs_hash, metadata, ttl=settings.IPFS_CACHE_TTL if metadata else settings.IPFS_NEGATIVE_TTL)
+    return metadata
+
+
+class GatewayScores:
+    """Rolling latency and error score of IPFS gateways (exponential moving average)"""
+
+    def __init__(self, gateways: List[str], alpha: float = 0.2, timeout: float = 5.0):
+        self.alpha = alpha
+        self.timeout = timeout
+        self.latency = {gateway: 1.0 for gateway in gateways}
+        self.error_rate = {gateway: 0.0 for gateway in gateways}
+
+    def record(self, gateway: str, latency: Optional[float]) -> None:
+        """Record request result, latency is None for failed requests"""
+        failed = latency is None
+        self.error_rate[gateway] += self.alpha * (float(failed) - self.error_rate[gateway])
+        if not failed:
+            self.latency[gateway] += self.alpha * (latency - self.latency[gateway])
+
+    def score(self, gateway: str) -> float:
+        # Ошибка стоит как полный таймаут
+        return self.latency[gateway] + self.error_rate[gateway] * self.timeout
+
+    def ordered(self) -> List[str]:
+        return sorted(self.latency, key=self.score)
+
+    def stats(self) -> dict:
+        return {
+            gateway: {"latency": self.latency[gateway], "error_rate": self.error_rate[gateway]}
+            for gateway in self.ordered()
+        }
+
+
+gateway_scores = GatewayScores(IPFS_GATEWAYS)
+metrics.register_source("ipfs_gateways", gateway_scores.stats)
+
+
+async def _fetch_candidate(url: str, gateway: Optional[str]) -> Optional[Dict]:
+    """Fetch metadata json from one url, returns None if response is not valid metadata"""
+    start_time = time.perf_counter()
+    metadata = None
+    try:
+        response = await get_client("ipfs").get(url, timeout=5)
+        if response.status_code == 200:
+            metadata = response.json() or {}
+            # Для исходного uri без картинки пробуем шлюзы
+            if not isinstance(metadata, dict) or (gateway is None and not isinstance(metadata.get("image"), str)):
+                metadata = None
+        else:
+            logging.warning(f"Error code {response.status_code} for {url}")
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        logging.error(f"Bad request: {url}. Error: {e}")
+    except asyncio.CancelledError:
+        # Проигравший гонку шлюз, который не ответил за время хеджа, штрафуем как ошибку,
+        # иначе медленный или зависший шлюз сохранял бы хороший счет и шел первым
+        if gateway and time.perf_counter() - start_time >= settings.IPFS_HEDGE_DELAY:
+            gateway_scores.record(gateway, None)
+        raise
+
+    if gateway:
+        gateway_scores.record(gateway, time.perf_counter() - start_time if metadata is not None else None)
+    return metadata
+
+
+async def _fetch_ipfs_metadata(uri: str, ipfs_hash: Optional[str]) -> Dict:
+    """Retrieve tokens metadata by IPFS URI racing the original uri and gateways.
+
+    Candidates are started in order (original uri, then gateways by score), next one
+    is started when the previous fails or after settings.IPFS_HEDGE_DELAY seconds.
+    First valid json wins, the rest requests are cancelled, gateways among them
+    which had at least the hedge delay to answer are scored as failed.
+    """
+    candidates = [(uri, None)]
+    if ipfs_hash:
+        candidates += [
+            (f"{gateway}/ipfs/{ipfs_hash}", gateway)
+            for gateway in gateway_scores.ordered()
+            if f"{gateway}/ipfs/{ipfs_hash}" != uri
+        ]
+    else:
+        logging.error(f"Некорректный IPFS URI: {uri}")
+
+    pending = set()
+    try:
+        while candidates or pending:
+            if candidates:
+                pending.add(asyncio.create_task(_fetch_candidate(*candidates.pop(0))))
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=settings.IPFS_HEDGE_DELAY if candidates else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                metadata = task.result()
+                if metadata is not None:
+                    return _rewrite_image_gateway(metadata)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return {}
+
+
+def _rewrite_image_gateway(metadata: Dict) -> Dict:
+    if "image" in metadata and isinstance(metadata["image"], str):
+        image_parsed = urlparse(metadata["image"])
+        for g in IPFS_GATEWAYS:
+            if image_parsed.netloc and image_parsed.netloc in g:
+                metadata["image"] = metadata["image"].replace(image_parsed.netloc, "ipfs.io")
+                break
+    return metadata
+
+
+METADATA_FIELDS = ["description", "image", "twitter", "website", "createdOn"]
+
+
+# Запросы метаданных по uri, общие для одновременных ответов; не успевшие к дедлайну
+# досчитываются в фоне и попадают в кэш
+_lookups: Dict[str, asyncio.Task] = {}
+
+
+def _log_lookup_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"IPFS metadata lookup failed: {task.exception()}")
+
+
+def _lookup(uri: str) -> asyncio.Task:
+    task = _lookups.get(uri)
+    if task is None:
+        task = asyncio.create_task(fetch_ipfs_metadata(uri))
+        _lookups[uri] = task
+        task.add_done_callback(lambda _: _lookups.pop(uri, None))
+        task.add_done_callback(_log_lookup_error)
+    return task
+
+
+async def enrich_with_metadata(currencies: List[Dict], fields: List[str] = METADATA_FIELDS) -> None:
+    """Fetch IPFS metadata for all currencies concurrently and update them in place.
+
+    Lookups run under settings.IPFS_CONCURRENCY semaphore and the whole stage is
+    limited by settings.IPFS_DEADLINE, currencies which missed the deadline get
+    empty metadata fields instead of holding up the response. Lookups already
+    started keep running in background and cache their result for next requests.
+    """
+    semaphore = asyncio.Semaphore(settings.IPFS_CONCURRENCY)
+
+    async def fetch(uri: str) -> Optional[Dict]:
+        async with semaphore:
+            # shield: отмена по дедлайну не отменяет сам запрос
+            return await asyncio.shield(_lookup(uri))
+
+    tasks = {uri: asyncio.create_task(fetch(uri)) for uri in {c.get("Uri") for c in currencies} if uri}
+
+    results = {}
+    if tasks:
+        done, pending = await asyncio.wait(tasks.values(), timeout=settings.IPFS_DEADLINE)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logging.warning(f"IPFS metadata deadline missed for {len(pending)} of {len(tasks)} uris")
+            metrics.incr("ipfs_deadline_missed", len(pending))
+
+        for uri, task in tasks.items():
+            if task in done and task.exception() is None:
+                results[uri] = task.result() or {}
+
+    for currency in currencies:
+        metadata = results.get(currency.get("Uri"), {})
+        currency.update({field: metadata.get(field, "") for field in fields})
@@ -0,0 +1,26 @@
+from collections import defaultdict
+from typing import Callable, Dict
+
+# Простые счетчики процесса (на один воркер uvicorn)
+_counters: Dict[str, float] = defaultdict(float)
+
+# Источники, которые сами отдают свою статистику (пулы, кэши и т.д.)
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Increase counter `name` by `value`"""
+    _counters[name] += value
+
+
+def register_source(name: str, source: Callable[[], dict]) -> None:
+    """Register callable returning dict with stats, it is called on every snapshot"""
+    _sources[name] = source
+
+
+def snapshot() -> dict:
+    """Collect all counters and registered sources into one dict"""
+    result = {"counters": dict(_counters)}
+    for name, source in _sources.items():
+        result[name] = source()
+    return result
@@ -0,0 +1,78 @@
+"""
+Startup profiling: per-module import time and time to first request.
+
+Enabled with PROFILE_STARTUP=1 environment variable. It is read directly from
+os.environ (not Settings) because the timer has to be installed before
+src.config and its dependencies are imported.
+"""
+import os
+import sys
+import time
+import builtins
+
+from typing import Dict, Optional
+
+from src.utils import metrics
+
+ENABLED = os.getenv("PROFILE_STARTUP", "").lower() in ("1", "true", "yes")
+
+_process_start = time.perf_counter()
+_original_import = builtins.__import__
+_import_times: Dict[str, float] = {}  # кумулятивное время первого импорта модуля
+_startup_time: Optional[float] = None
+_first_request_time: Optional[float] = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    start_time = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_times.setdefault(name, time.perf_counter() - start_time)
+
+
+def start() -> None:
+    """Install import timer, must be called before other app imports"""
+    if ENABLED:
+        builtins.__import__ = _timed_import
+        metrics.register_source("startup", stats)
+
+
+def startup_complete() -> None:
+    """Called at the end of startup_event, logs slowest imports"""
+    global _startup_time
+    if not ENABLED or _startup_time is not None:
+        return
+    _startup_time = time.perf_counter() - _process_start
+    builtins.__import__ = _original_import
+
+    from src.utils.logger import logger
+
+    slowest = sorted(_import_times.items(), key=lambda item: item[1], reverse=True)[:20]
+    logger.warning(
+        f"Startup finished in {_startup_time:.3f}s, slowest imports: "
+        + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in slowest)
+    )
+
+
+def request_served() -> None:
+    """Called after every request, logs time to the first one"""
+    global _first_request_time
+    if not ENABLED or _first_request_time is not None:
+        return
+    _first_request_time = time.perf_counter() - _process_start
+
+    from src.utils.logger import logger
+
+    logger.warning(f"First request served {_first_request_time:.3f}s after worker start")
+
+
+def stats() -> dict:
+    return {
+        "startup_time": _startup_time,
+        "first_request_time": _first_request_time,
+        "imports": dict(sorted(_import_times.items(), key=lambda item: item[1], reverse=True)[:50]),
+    }
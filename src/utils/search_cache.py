@@ -0,0 +1,173 @@
+import re
+import time
+import zlib
+import asyncio
+
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.cache import TwoTierCache
+
+EMBEDDING_SIZE = 512
+
+ADDRESS_OR_SYMBOL = re.compile(r"\$[A-Za-z0-9]+|(?<![1-9A-HJ-NP-Za-km-z])[1-9A-HJ-NP-Za-km-z]{32,44}(?![1-9A-HJ-NP-Za-km-z])")
+
+# Короткие слова, которые не считаются сущностями (тикерами) при сравнении запросов
+COMMON_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "why", "what", "how", "who", "when", "where", "which",
+    "do", "does", "did", "it", "its", "of", "to", "in", "on", "for", "and", "or", "with", "about", "me", "my",
+    "i", "you", "your", "we", "now", "today", "news", "price", "will", "can", "any", "this", "that", "these",
+    "up", "down", "at", "by", "from", "so", "just", "much", "many", "more", "most", "best", "top", "new",
+    "there", "than", "then", "has", "have", "had", "get", "going", "all", "some", "right",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", query.lower()).strip(" ?!.")
+
+
+def extract_entities(query: str) -> str:
+    """Tickers, $symbols, addresses and numbers of query, similarity hits require them to match exactly.
+
+    Tickers are detected by shape: written in caps (BTC) or short words (sol, wif)
+    outside COMMON_WORDS, so a few ordinary short words count as entities too.
+    """
+    entities = {match.lower() for match in ADDRESS_OR_SYMBOL.findall(query)}
+    for word in re.findall(r"[A-Za-z0-9]+", ADDRESS_OR_SYMBOL.sub(" ", query)):
+        lowered = word.lower()
+        if lowered in COMMON_WORDS:
+            continue
+        if (len(word) >= 2 and word.isupper()) or any(char.isdigit() for char in word) or len(word) <= 5:
+            entities.add(lowered)
+    return ",".join(sorted(entities))
+
+
+def query_ttl(normalized: str, recency: str) -> int:
+    """Ttl by recency filter, shortened when query asks about now/today/latest"""
+    ttls = [settings.SEARCH_CACHE_TTL.get(recency, settings.SEARCH_CACHE_DEFAULT_TTL)]
+    words = f" {normalized} "
+    for time_word, time_recency in settings.SEARCH_CACHE_TIME_WORDS.items():
+        if f" {time_word} " in words:
+            ttls.append(settings.SEARCH_CACHE_TTL[time_recency])
+    return min(ttls)
+
+
+def embed(query: str):
+    """Local hashed bag of words and character trigrams, L2 normalized"""
+    import numpy as np
+
+    vector = np.zeros(EMBEDDING_SIZE, dtype=np.float32)
+    words = query.split()
+    features = words + [f"#{word[i:i + 3]}" for word in words for i in range(max(1, len(word) - 2))]
+    for feature in features:
+        vector[zlib.crc32(feature.encode()) % EMBEDDING_SIZE] += 1
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarityIndex:
+    """In-process list of (bucket, embedding, cache key) for near-duplicate lookup"""
+
+    def __init__(self, maxsize: int):
+        self._entries: Deque[Tuple[str, object, str, float]] = deque(maxlen=maxsize)
+
+    def add(self, bucket: str, vector, key: str, ttl: int) -> None:
+        self._entries.append((bucket, vector, key, time.monotonic() + ttl))
+
+    def nearest(self, bucket: str, vector, threshold: float) -> Optional[str]:
+        now = time.monotonic()
+        best_key, best_score = None, threshold
+        for entry_bucket, entry_vector, key, expires_at in self._entries:
+            if entry_bucket != bucket or expires_at < now:
+                continue
+            score = float(vector @ entry_vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SearchCache:
+    """Cache of paid search answers in front of Perplexity tools.
+
+    Exact tier is keyed by normalized query, model, recency filter and mode and
+    lives in TwoTierCache. Similarity tier (settings.SEARCH_CACHE_SIMILARITY)
+    maps near-duplicate queries of the same model/recency/mode and the same
+    entities (tickers, addresses) onto exact keys. Ttl follows
+    search_recency_filter and time words of the query (query_ttl). Concurrent
+    misses for the same key in a worker share one search call.
+    """
+
+    def __init__(self, namespace: str):
+        self.exact = TwoTierCache(namespace, maxsize=settings.SEARCH_CACHE_SIZE)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.similar = SimilarityIndex(settings.SEARCH_CACHE_SIZE)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        metrics.register_source(f"search_cache.{namespace}", self.stats)
+
+    async def get_or_search(
+        self,
+        query: str,
+        model: str,
+        recency: str,
+        search: Callable[[], Awaitable[dict]],
+        mode: str = "",
+    ) -> dict:
+        bucket = f"{model}:{recency}:{mode}"
+        normalized = normalize_query(query)
+        key = f"{bucket}:{normalized}"
+
+        result = await self.exact.get(key)
+        if result is not None:
+            self.exact_hits += 1
+            return result
+
+        ttl = query_ttl(normalized, recency)
+        # Похожие запросы ищем только среди запросов про те же токены и с тем же ttl
+        similar_bucket = f"{bucket}:{ttl}:{extract_entities(query)}"
+
+        vector = None
+        if settings.SEARCH_CACHE_SIMILARITY:
+            vector = embed(normalized)
+            similar_key = self.similar.nearest(similar_bucket, vector, settings.SEARCH_CACHE_SIMILARITY_THRESHOLD)
+            if similar_key is not None and (result := await self.exact.get(similar_key)) is not None:
+                self.similar_hits += 1
+                return result
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._search(key, search, ttl, similar_bucket, vector))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: отмена одного из ожидающих запросов не отменяет платный поиск для остальных
+        return await asyncio.shield(task)
+
+    async def _search(self, key: str, search: Callable[[], Awaitable[dict]], ttl: int, similar_bucket: str, vector) -> dict:
+        result = await search()
+        await self.exact.set(key, result, ttl)
+        if vector is not None:
+            self.similar.add(similar_bucket, vector, key, ttl)
+        return result
+
+    def stats(self) -> dict:
+        total = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "similarity_index_size": len(self.similar),
+            "hit_rate": (self.exact_hits + self.similar_hits) / total if total else 0,
+        }
@@ -0,0 +1,44 @@
+import time
+import asyncio
+
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from src.config import settings
+
+
+def word_chunks(text: str) -> Iterator[str]:
+    """Split canned answer into word chunks with trailing space"""
+    for word in text.split():
+        yield word + " "
+
+
+async def pace(chunks: Iterable[str], rate: Optional[float] = None) -> AsyncIterator[str]:
+    """Yield synthetic stream (mock, canned or replayed answer) at `rate` chunks per second.
+
+    Waiting is done with asyncio.sleep, so the event loop keeps serving other
+    requests. Chunks are scheduled from the stream start: when the client reads
+    slower than the rate, all chunks that are already due are sent as one.
+    rate=0 sends everything without delay.
+    """
+    rate = settings.STREAM_PACE_RATE if rate is None else rate
+    iterator = iter(chunks)
+    start_time = time.monotonic()
+    sent = 0
+
+    for chunk in iterator:
+        if rate <= 0:
+            yield chunk
+            continue
+
+        delay = start_time + sent / rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # Клиент не успевает читать, склеиваем все чанки, время которых уже прошло
+        due = int((time.monotonic() - start_time) * rate) + 1
+        buffer = [chunk]
+        sent += 1
+        while sent < due and (next_chunk := next(iterator, None)) is not None:
+            buffer.append(next_chunk)
+            sent += 1
+        yield "".join(buffer)
@@ -28,4 +28,36 @@ The name should be no longer than 12 tokens.
 """
 
     response = await llm.ainvoke(prompt)
-    return response.content.strip() 
\ No newline at end of file
+    return response.content.strip() 
+
+async def summarize_history(summary: str, messages: list[dict]) -> str:
+    """
+    Folds older chat messages into a rolling summary.
+
+    Args:
+        summary: Summary of even older messages, empty for the first fold
+        messages: Messages to fold, dicts with role and content
+
+    Returns:
+        str: Updated summary (no more than settings.CHAT_SUMMARY_MAX_TOKENS tokens)
+    """
+    llm = ChatOpenAI(
+        temperature=0,
+        model="gpt-4o-mini",
+        max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS
+    )
+
+    dialogue = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    prompt = f"""Update the summary of a conversation between a user and a crypto assistant.
+
+Current summary: {summary or "none"}
+
+New messages:
+{dialogue}
+
+Keep tokens, mint addresses, wallets, timeframes and user preferences that may matter later.
+Answer with the updated summary only.
+"""
+
+    response = await llm.ainvoke(prompt)
+    return response.content.strip()
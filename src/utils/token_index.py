@@ -0,0 +1,153 @@
+import json
+import time
+import asyncio
+
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.cache import LRUCache, get_redis
+from src.utils.logger import logger
+
+# Функция поиска токена по тикеру, возвращает Currency с Name, Symbol и MintAddress
+SymbolLookup = Callable[[str], Awaitable[Optional[dict]]]
+
+
+class TokenIndex:
+    """Symbol/name -> mint address index kept in process memory and redis hash.
+
+    Entries are learned from symbol lookups, loaded from redis on startup and
+    refreshed in background when older than settings.TOKEN_INDEX_REFRESH.
+    Unknown tickers are remembered in process for settings.TOKEN_INDEX_NEGATIVE_TTL
+    seconds, so repeated requests for them do not go to Bitquery.
+    """
+
+    def __init__(self, redis_key: str = "token_index"):
+        self.redis_key = redis_key
+        self._entries: Dict[str, dict] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._unknown = LRUCache(settings.TOKEN_INDEX_NEGATIVE_SIZE)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        metrics.register_source("token_index", self.stats)
+
+    @staticmethod
+    def _symbol_key(symbol: str) -> str:
+        return f"symbol:{symbol.strip().lstrip('$').upper()}"
+
+    @staticmethod
+    def _name_key(name: str) -> str:
+        return f"name:{' '.join(name.split()).lower()}"
+
+    async def warm(self) -> None:
+        """Load all known entries from redis"""
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            entries = await redis.hgetall(self.redis_key)
+        except RedisError as e:
+            logger.warning(f"Token index warm up failed: {e}")
+            return
+        self._entries.update({key: json.loads(value) for key, value in entries.items()})
+        logger.info(f"Token index warmed with {len(entries)} entries")
+
+    async def _get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None and (redis := get_redis()) is not None:
+            try:
+                raw = await redis.hget(self.redis_key, key)
+            except RedisError as e:
+                logger.warning(f"Token index get failed for {key}: {e}")
+                raw = None
+            if raw is not None:
+                entry = json.loads(raw)
+                self._entries[key] = entry
+        return entry
+
+    async def learn(self, currency: dict, aliases: Iterable[str] = ()) -> None:
+        """Store mint address of currency under its symbol, name and `aliases` (queried tickers)"""
+        mint_address = currency.get("MintAddress")
+        if not mint_address:
+            return
+
+        entry = {"mint_address": mint_address, "resolved_at": time.time()}
+        keys = []
+        if currency.get("Symbol"):
+            keys.append(self._symbol_key(currency["Symbol"]))
+        if currency.get("Name"):
+            keys.append(self._name_key(currency["Name"]))
+        keys += [self._symbol_key(alias) for alias in aliases if self._symbol_key(alias) not in keys]
+        for key in keys:
+            self._entries[key] = entry
+
+        redis = get_redis()
+        if redis is not None and keys:
+            try:
+                await redis.hset(self.redis_key, mapping={key: json.dumps(entry) for key in keys})
+            except RedisError as e:
+                logger.warning(f"Token index set failed for {keys}: {e}")
+
+    async def _lookup(self, symbol: str, lookup: SymbolLookup) -> Optional[str]:
+        currency = await lookup(symbol)
+        if not currency:
+            return None
+        # Найденный Symbol может отличаться от запрошенного тикера, запоминаем и под запрошенным
+        await self.learn(currency, aliases=[symbol])
+        return currency.get("MintAddress")
+
+    def _refresh_in_background(self, symbol: str, lookup: SymbolLookup) -> None:
+        if symbol in self._refreshing:
+            return
+        task = asyncio.create_task(self._lookup(symbol, lookup))
+        self._refreshing[symbol] = task
+        task.add_done_callback(lambda t: self._refresh_done(symbol, t))
+
+    def _refresh_done(self, symbol: str, task: asyncio.Task) -> None:
+        self._refreshing.pop(symbol, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Token index refresh failed for {symbol}: {task.exception()}")
+
+    async def resolve_symbol(self, symbol: str, lookup: SymbolLookup) -> Optional[str]:
+        """Mint address for ticker, calls lookup only for unknown tickers"""
+        key = self._symbol_key(symbol)
+        entry = await self._get(key)
+        if entry is None:
+            if self._unknown.get(key) is not None:
+                self.negative_hits += 1
+                return None
+            self.misses += 1
+            mint_address = await self._lookup(symbol, lookup)
+            if mint_address is None:
+                self._unknown.set(key, True, settings.TOKEN_INDEX_NEGATIVE_TTL)
+            return mint_address
+
+        self.hits += 1
+        if time.time() - entry["resolved_at"] > settings.TOKEN_INDEX_REFRESH:
+            self._refresh_in_background(symbol, lookup)
+        return entry["mint_address"]
+
+    async def resolve_name(self, name: str) -> Optional[str]:
+        """Mint address for token name if it was seen before"""
+        entry = await self._get(self._name_key(name))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["mint_address"]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "unknown": len(self._unknown),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0,
+        }
+
+
+token_index = TokenIndex()
@@ -0,0 +1,26 @@
+from src.config import settings
+from src.utils import metrics
+
+
+def token_usage(output) -> dict:
+    """usage_metadata of on_chat_model_end output, empty if model did not report it.
+
+    A failed model call ends with {"generations": [[]]}, the real error is
+    raised by the agent run, here it is just no usage.
+    """
+    if isinstance(output, dict):
+        generations = output.get("generations") or [[]]
+        output = generations[0][0].get("message") if generations[0] else None
+    return getattr(output, "usage_metadata", None) or {}
+
+
+def record_usage(tier: str, model: str, usage: dict) -> None:
+    prices = settings.MODEL_PRICES.get(model, {})
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    metrics.incr(f"model_tier.{tier}.input_tokens", input_tokens)
+    metrics.incr(f"model_tier.{tier}.output_tokens", output_tokens)
+    metrics.incr(
+        f"model_tier.{tier}.cost_usd",
+        (input_tokens * prices.get("input", 0) + output_tokens * prices.get("output", 0)) / 1_000_000,
+    )
@@ -1,16 +1,30 @@
 import httpx
 from dotenv import load_dotenv
 import os
+import time
+import asyncio
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.http_client import get_client
+from src.utils.logger import logger
+from src.utils.search_cache import SearchCache
 
 load_dotenv()
 
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
+
+search_cache = SearchCache("perplexity")
     
 async def perplexity_search(query) -> dict:
     # Check if API key exists
     if not PERPLEXITY_API_KEY:
         raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
-    
+
+    return await search_cache.get_or_search(query, "sonar", "month", lambda: _perplexity_search(query))
+
+
+async def _perplexity_search(query) -> dict:
     headers = {
         "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
         "Content-Type": "application/json"
@@ -37,69 +51,104 @@ async def perplexity_search(query) -> dict:
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.perplexity.ai/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            return {"answer": result["choices"][0]["message"]["content"]}
+        response = await get_client("perplexity").post(
+            "https://api.perplexity.ai/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=30
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        return {"answer": result["choices"][0]["message"]["content"]}
     except httpx.HTTPError as e:
         raise Exception(f"Error during Perplexity API request: {str(e)}")
     
+async def _research_prompt(name: str, prompt: str, time_range: str) -> str:
+    """Single sonar-pro request of deep_research_twitter, latency is recorded per prompt name"""
+    headers = {
+        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "model": "sonar-pro",
+        "messages": [{"role": "user", "content": prompt}],
+        "search_recency_filter": "day" if time_range == "day" else "week",
+        "search_domain_filter": ["twitter.com", "x.com"],
+        "max_tokens": 500,
+        "temperature": 0.3,
+        "top_p": 0.9,
+        "frequency_penalty": 1
+    }
+
+    start_time = time.perf_counter()
+    try:
+        response = await get_client("perplexity").post(
+            "https://api.perplexity.ai/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=45
+        )
+        response.raise_for_status()
+        answer = response.json()["choices"][0]["message"]["content"]
+    except asyncio.CancelledError:
+        # Отменен по дедлайну, в timeouts его уже посчитал deep_research_twitter
+        logger.info(f"Twitter research prompt {name} cancelled after {time.perf_counter() - start_time:.2f}s")
+        raise
+
+    elapsed = time.perf_counter() - start_time
+    metrics.incr(f"twitter_research.{name}.calls")
+    metrics.incr(f"twitter_research.{name}.seconds", elapsed)
+    logger.info(f"Twitter research prompt {name} finished in {elapsed:.2f}s")
+    return answer
+
+
 async def deep_research_twitter(topic, time_range="day") -> dict:
     """
     Performs deep research on Twitter using Perplexity API
     time_range: 'day' or 'week'
+
+    Prompts are sent concurrently and limited by settings.TWITTER_RESEARCH_DEADLINE,
+    the answer is assembled from prompts that succeeded in time.
     """
     if not PERPLEXITY_API_KEY:
         raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
     
     # Construct research prompts
-    prompts = [
-        f"Provide the latest {time_range}'s Twitter discussions and analysis about {topic}",
-        f"What are the most viral and significant Twitter threads about {topic} in the last {time_range}?",
-        f"What are the expert Twitter opinions and trending discussions about {topic} from the last {time_range}?"
-    ]
-    
+    prompts = {
+        "latest": f"Provide the latest {time_range}'s Twitter discussions and analysis about {topic}",
+        "viral": f"What are the most viral and significant Twitter threads about {topic} in the last {time_range}?",
+        "experts": f"What are the expert Twitter opinions and trending discussions about {topic} from the last {time_range}?"
+    }
+
+    tasks = {
+        name: asyncio.create_task(_research_prompt(name, prompt, time_range))
+        for name, prompt in prompts.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=settings.TWITTER_RESEARCH_DEADLINE)
+    for task in pending:
+        task.cancel()
+
+    # Порядок ответов сохраняем как в prompts, упавшие и опоздавшие пропускаем
     answers = []
-    for prompt in prompts:
-        try:
-            headers = {
-                "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "sonar-pro",
-                "messages": [{"role": "user", "content": prompt}],
-                "search_recency_filter": "day" if time_range == "day" else "week",
-                "search_domain_filter": ["twitter.com", "x.com"],
-                "max_tokens": 500,
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "frequency_penalty": 1
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    json=payload,
-                    headers=headers,
-                    timeout=45
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                answers.append(result["choices"][0]["message"]["content"])
-                
-        except httpx.HTTPError as e:
-            raise Exception(f"Error during deep research: {str(e)}")
-    
+    errors = []
+    for name, task in tasks.items():
+        if task not in done:
+            metrics.incr(f"twitter_research.{name}.timeouts")
+            logger.warning(f"Twitter research prompt {name} missed the deadline")
+        elif task.exception() is not None:
+            metrics.incr(f"twitter_research.{name}.failures")
+            logger.warning(f"Twitter research prompt {name} failed: {task.exception()}")
+            errors.append(task.exception())
+        else:
+            answers.append(task.result())
+
+    if not answers:
+        if errors:
+            raise Exception(f"Error during deep research: {str(errors[0])}")
+        raise Exception("Error during deep research: deadline exceeded")
+
     return {"answer": "\n".join(answers)}
 
 async def web_deep_search(query, search_type="comprehensive") -> dict:
@@ -122,7 +171,13 @@ async def web_deep_search(query, search_type="comprehensive") -> dict:
             "Provide a focused and specific answer based on the most relevant "
             "and authoritative sources. Prioritize accuracy and conciseness."
         )
-    
+
+    return await search_cache.get_or_search(
+        query, "sonar-pro", "month", lambda: _web_deep_search(query, system_prompt), mode=search_type
+    )
+
+
+async def _web_deep_search(query, system_prompt) -> dict:
     try:
         headers = {
             "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
@@ -143,17 +198,16 @@ async def web_deep_search(query, search_type="comprehensive") -> dict:
             "presence_penalty": 0
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.perplexity.ai/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=45
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            return {"answer": result["choices"][0]["message"]["content"]}
+        response = await get_client("perplexity").post(
+            "https://api.perplexity.ai/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=45
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        return {"answer": result["choices"][0]["message"]["content"]}
             
     except httpx.HTTPError as e:
         raise Exception(f"Error during web deep search: {str(e)}")
@@ -176,6 +230,5 @@ print(focused["answer"])
 """
 
 if __name__ == "__main__":
-    import asyncio
     result = asyncio.run(perplexity_search("What is the capital of France?"))
     print(result["answer"])
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of calculate_volumes on synthetic DEXTradeByTokens payloads.
+Compares current single-pass implementation with the previous pandas one
+(json round trip + DataFrame + Trade.apply per field).
+
+Run from repo root:
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m tests.benchmarks.bench_calculate_volumes
+"""
+import json
+import random
+import timeit
+
+import pandas as pd
+
+from src.routers.toolcall import calculate_volumes
+
+DEXES = ["raydium", "orca", "meteora", "pump", "phoenix", "lifinity"]
+
+
+def make_payload(size: int) -> dict:
+    trades = [
+        {
+            "Trade": {
+                "Currency": {"Name": "Token", "MintAddress": "mint", "Symbol": "TKN"},
+                "start": random.uniform(0.5, 1.5),
+                "min5": random.uniform(0.5, 1.5),
+                "end": random.uniform(0.5, 1.5),
+                "Dex": {"ProtocolName": random.choice(DEXES), "ProtocolFamily": "f", "ProgramAddress": "p"},
+                "Market": {"MarketAddress": f"market{i}"},
+                "Side": {"Currency": {"Symbol": "SOL", "Name": "Solana", "MintAddress": "sol"}},
+            },
+            "makers": str(random.randint(1, 100)),
+            "trades": str(random.randint(1, 1000)),
+            "traded_volume": str(random.uniform(0, 1e6)),
+            "buy_volume": str(random.uniform(0, 5e5)),
+            "sell_volume": str(random.uniform(0, 5e5)),
+        }
+        for i in range(size)
+    ]
+    return {
+        "Solana": {
+            "DEXTradeByTokens": trades,
+            "BalanceUpdates": [{"count": "1234"}],
+            "TokenSupplyUpdates": [{"TokenSupplyUpdate": {"PostBalance": "1000", "PostBalanceInUSD": "2000"}}],
+        }
+    }
+
+
+def legacy_calculate_volumes(data: dict) -> dict:
+    """Previous implementation, kept here only for comparison"""
+    data = json.loads(json.dumps(data))
+    trades = data["Solana"]["DEXTradeByTokens"]
+
+    df = pd.DataFrame(trades)
+    df["currency"] = df["Trade"].apply(lambda x: x["Currency"]["Symbol"] if x else None)
+    df["dex"] = df["Trade"].apply(lambda x: x["Dex"]["ProtocolName"] if x else None)
+    df["market"] = df["Trade"].apply(lambda x: x["Market"]["MarketAddress"] if x else None)
+    df["start_price"] = df["Trade"].apply(lambda x: x.get("start", 0) if x else 0)
+    df["min5_price"] = df["Trade"].apply(lambda x: x.get("min5", 0) if x else 0)
+    df["end_price"] = df["Trade"].apply(lambda x: x.get("end", 0) if x else 0)
+    for col in ["buy_volume", "sell_volume", "traded_volume", "trades", "makers"]:
+        df[col] = pd.to_numeric(df.get(col, 0), errors="coerce").fillna(0)
+
+    return {
+        "totalTradedVolume": df["traded_volume"].sum(),
+        "totalBuyVolume": df["buy_volume"].sum(),
+        "priceChangePercentage": (df["end_price"].mean() - df["start_price"].mean()) / df["start_price"].mean() * 100,
+        "uniqueDexPlatforms": df["dex"].nunique(),
+        "averageVolumeByDex": df.groupby("dex")["traded_volume"].sum().to_dict(),
+    }
+
+
+def main():
+    for size in (100, 1_000, 10_000, 100_000):
+        payload = make_payload(size)
+
+        current = calculate_volumes(payload)
+        legacy = legacy_calculate_volumes(payload)
+        assert abs(current.totalTradedVolume - legacy["totalTradedVolume"]) < 1e-6 * max(1, legacy["totalTradedVolume"])
+        assert abs(current.priceChangePercentage - legacy["priceChangePercentage"]) < 1e-6
+        assert current.uniqueDexPlatforms == legacy["uniqueDexPlatforms"]
+
+        number = max(1, 10_000 // size)
+        current_time = timeit.timeit(lambda: calculate_volumes(payload), number=number) / number
+        legacy_time = timeit.timeit(lambda: legacy_calculate_volumes(payload), number=number) / number
+        print(f"{size:>7} trades: current {current_time * 1000:8.2f} ms | legacy {legacy_time * 1000:8.2f} ms | x{legacy_time / current_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Query plans of chat endpoints on sqlite after migrations.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/db
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.future import select
+
+from src.db.migrations import MIGRATIONS, migrate
+from src.models import Chat, ChatHistory
+from src.routers.user import history_query
+
+# Схема до появления индексов, как в уже развернутых базах
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, wallet_id VARCHAR NOT NULL UNIQUE)",
+    "CREATE TABLE chats (id INTEGER PRIMARY KEY, uuid VARCHAR NOT NULL UNIQUE, name VARCHAR NOT NULL, "
+    "wallet_id VARCHAR NOT NULL REFERENCES users (wallet_id))",
+    "CREATE TABLE chat_history (id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL REFERENCES chats (id), "
+    "message TEXT NOT NULL, timestamp DATETIME)",
+]
+
+
+async def query_plan(engine, statement) -> str:
+    sql = statement.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+async def migrated_plans(tmp_path, legacy: bool) -> dict:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}")
+    if legacy:
+        async with engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                await conn.execute(text(statement))
+
+    await migrate(engine)
+    await migrate(engine)  # повторный запуск ничего не меняет
+
+    async with engine.connect() as conn:
+        versions = (await conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))).scalars().all()
+    plans = {
+        "versions": versions,
+        "get_chats": await query_plan(engine, select(Chat).filter(Chat.wallet_id == "wallet")),
+        "get_chat_history": await query_plan(engine, history_query(1, None, descending=False)),
+        "get_chat_history_page": await query_plan(
+            engine, history_query(1, "2025-01-26T18:47:58.953000_42", descending=True).limit(20)
+        ),
+    }
+    await engine.dispose()
+    return plans
+
+
+def check_plans(plans: dict):
+    assert plans["versions"] == [migration.version for migration in MIGRATIONS]
+    assert "USING INDEX ix_chats_wallet_id" in plans["get_chats"]
+    for query in ("get_chat_history", "get_chat_history_page"):
+        assert "USING INDEX ix_chat_history_chat_id_timestamp_id" in plans[query]
+        assert "TEMP B-TREE" not in plans[query]
+
+
+def test_query_plans_on_new_database(tmp_path):
+    """Test that tables created from models get indexes used by chat queries"""
+    check_plans(asyncio.run(migrated_plans(tmp_path, legacy=False)))
+
+
+def test_query_plans_after_migrating_legacy_database(tmp_path):
+    """Test that migrations add indexes to database created before them"""
+    check_plans(asyncio.run(migrated_plans(tmp_path, legacy=True)))
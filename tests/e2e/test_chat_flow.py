@@ -1,3 +1,4 @@
+import json
 import requests
 import uuid
 import time
@@ -63,6 +64,42 @@ def test_chat_flow():
     assert history[0]["question"] == messages[0]["content"]
     assert history[0]["answer"] == answer
 
+def test_chat_history_pagination():
+    """Test keyset pagination and NDJSON streaming of chat history"""
+    wallet_id = "test_wallet_" + str(uuid.uuid4())
+    chat_uuid = str(uuid.uuid4())
+
+    response = requests.post(f"{BASE_URL}/user/", json={"wallet_id": wallet_id})
+    assert response.status_code == 200
+
+    for i in range(5):
+        response = requests.post(
+            f"{BASE_URL}/user/chats/",
+            params={"wallet_id": wallet_id},
+            json={"uuid": chat_uuid, "name": "Test Chat", "question": f"question {i}", "answer": f"answer {i}"}
+        )
+        assert response.status_code == 200
+
+    # Последняя страница, затем более старые по cursor
+    response = requests.get(f"{BASE_URL}/user/chats/{chat_uuid}", params={"limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert [pair["question"] for pair in page] == ["question 3", "question 4"]
+
+    response = requests.get(f"{BASE_URL}/user/chats/{chat_uuid}", params={"limit": 2, "before": page[0]["cursor"]})
+    assert response.status_code == 200
+    assert [pair["question"] for pair in response.json()] == ["question 1", "question 2"]
+
+    response = requests.get(f"{BASE_URL}/user/chats/{chat_uuid}", params={"stream": True}, stream=True)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    pairs = [json.loads(line) for line in response.iter_lines() if line]
+    assert [pair["answer"] for pair in pairs] == [f"answer {i}" for i in range(5)]
+
+    response = requests.get(f"{BASE_URL}/user/chats/{chat_uuid}", params={"before": "invalid"})
+    assert response.status_code == 400
+
+
 def test_invalid_chat_history():
     """Test fetching chat history for a non-existent chat"""
     response = requests.get(f"{BASE_URL}/user/chats/nonexistent_chat")
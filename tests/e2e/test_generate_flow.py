@@ -53,8 +53,22 @@ def test_multiple_tool_calls():
     assert "WebSearch" in received_response
 
 
+def test_intent_router_dispatch():
+    """Test that a short widget request is answered by the intent router with tool frame and text"""
+    input_message = "chart $BONK 4h"
+
+    response = requests.post(BASE_URL, json={"messages": [{"role": "user", "content": input_message}]}, stream=True)
+
+    assert response.status_code == 200
+    received_response = read_stream_response(response)
+
+    assert '"name": "ChartDetailsAndStats"' in received_response
+    assert '"interval": "4h"' in received_response
+
+
 if __name__ == "__main__":
     test_mocked_config_response()
     test_chart_tool_called()
     test_multiple_tool_calls()
+    test_intent_router_dispatch()
     print("All tests passed successfully!")
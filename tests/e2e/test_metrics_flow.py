@@ -0,0 +1,20 @@
+import requests
+
+BASE_URL = "http://localhost:3011/api"
+
+
+def test_http_pool_metrics():
+    """Test that shared upstream clients report pool stats"""
+    response = requests.get(f"{BASE_URL}/metrics/")
+    assert response.status_code == 200
+
+    http_stats = response.json()["http"]
+    for upstream in ["bitquery", "ipfs", "perplexity"]:
+        assert upstream in http_stats
+        assert http_stats[upstream]["in_flight"] >= 0
+        assert "saturated" in http_stats[upstream]
+
+
+if __name__ == "__main__":
+    test_http_pool_metrics()
+    print("All tests passed successfully!")
@@ -30,8 +30,18 @@ def test_get_pumpfun_top_tokens():
     assert "data" in response.json()
 
 
+def test_get_market_chart_batch():
+    """Test fetching charts of several tokens with one request"""
+    mint_addresses = ["So11111111111111111111111111111111111111112", "2Bs4MW8NKBDy6Bsn2RmGLNYNn4ofccVWMHEiRcVvpump"]
+
+    response = requests.get(f"{BASE_URL}/market-chart/batch", params={"mint_addresses": mint_addresses, "interval": "1h"})
+    assert response.status_code == 200
+    assert set(response.json()["data"]) <= set(mint_addresses)
+
+
 if __name__ == "__main__":
     test_get_market_chart()
     test_get_market_chart_invalid_interval()
     test_get_pumpfun_top_tokens()
+    test_get_market_chart_batch()
     print("All tests passed successfully!")
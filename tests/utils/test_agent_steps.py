@@ -0,0 +1,89 @@
+"""
+Agent runs stop right after widget tools only when no other tool ran.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import json
+import asyncio
+
+from typing import Iterator, List
+
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+
+from src.utils.agent_steps import stop_after_widgets
+
+
+class ScriptedModel(BaseChatModel):
+    """Chat model answering with prepared messages, one per call"""
+    script: List[AIMessage]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next(self) -> AIMessage:
+        message = self.script[self.calls]
+        self.calls += 1
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._next()
+        tool_call_chunks = [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+            for index, call in enumerate(message.tool_calls)
+        ]
+        yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, tool_call_chunks=tool_call_chunks))
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+async def search(query: str) -> str:
+    """Search the web"""
+    return "search result"
+
+
+async def chart(token: str) -> str:
+    """Show token chart widget"""
+    return f"chart of {token}"
+
+
+PROMPT = ChatPromptTemplate.from_messages([("human", "{input}"), ("placeholder", "{agent_scratchpad}")])
+CHART_CALL = {"name": "chart", "args": {"token": "$BONK"}, "id": "chart_call", "type": "tool_call"}
+SEARCH_CALL = {"name": "search", "args": {"query": "bonk"}, "id": "search_call", "type": "tool_call"}
+
+
+def run_agent(script: List[AIMessage]):
+    model = ScriptedModel(script=script)
+    tools = [StructuredTool.from_function(coroutine=search), StructuredTool.from_function(coroutine=chart)]
+    agent = stop_after_widgets(create_tool_calling_agent(model, tools, PROMPT), {"chart"})
+    result = asyncio.run(AgentExecutor(agent=agent, tools=tools).ainvoke({"input": "chart $BONK"}))
+    return result["output"], model.calls
+
+
+def test_widget_only_run_stops_after_widget():
+    output, calls = run_agent([AIMessage(content="", tool_calls=[CHART_CALL])])
+
+    assert output == "chart of $BONK"
+    assert calls == 1
+
+
+def test_search_then_widget_run_continues_to_model_answer():
+    output, calls = run_agent([
+        AIMessage(content="", tool_calls=[SEARCH_CALL]),
+        AIMessage(content="", tool_calls=[CHART_CALL]),
+        AIMessage(content="BONK dumped after unlock"),
+    ])
+
+    assert output == "BONK dumped after unlock"
+    assert calls == 3
@@ -0,0 +1,111 @@
+"""
+Two-tier and response caches on top of fakeredis.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.utils import cache
+from src.utils.cache import ResponseCache, TwoTierCache
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    # decode_responses как в startup_event
+    client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    monkeypatch.setattr(cache, "_redis", client)
+    return client
+
+
+def counting_fetch(calls: list, delay: float = 0.0):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"value": len(calls)}
+    return fetch
+
+
+def test_two_tier_reads_other_worker_entry_from_redis(redis):
+    writer = TwoTierCache("test_two_tier", maxsize=10)
+    reader = TwoTierCache("test_two_tier", maxsize=10)
+
+    async def run():
+        await writer.set("cid", {"name": "BONK"}, ttl=60)
+        return await reader.get("cid"), await reader.get("cid"), await reader.get("other")
+
+    from_redis, from_local, missing = asyncio.run(run())
+    assert from_redis == from_local == {"name": "BONK"}
+    assert missing is None
+    assert (reader.redis_hits, reader.local_hits, reader.misses) == (1, 1, 1)
+
+
+def test_concurrent_misses_share_one_fetch(redis):
+    responses = ResponseCache("test_response_single_flight")
+    calls = []
+    fetch = counting_fetch(calls, delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(responses.get_or_fetch("top?limit=10", fetch, ttl=60) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == [1]
+    assert results == [{"value": 1}] * 5
+    assert responses.misses == 5
+    assert responses.coalesced == 4
+
+
+def test_concurrent_misses_across_workers_share_one_fetch(redis):
+    # Два экземпляра с общим redis, как два воркера uvicorn
+    workers = [ResponseCache("test_response_workers"), ResponseCache("test_response_workers")]
+    calls = []
+    fetch = counting_fetch(calls, delay=0.15)
+
+    async def run():
+        results = await asyncio.gather(*(worker.get_or_fetch("top?limit=10", fetch, ttl=60) for worker in workers))
+        return results, await redis.exists("test_response_workers:lock:top?limit=10")
+
+    results, locked = asyncio.run(run())
+    assert calls == [1]
+    assert results == [{"value": 1}] * 2
+    assert not locked
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(redis):
+    responses = ResponseCache("test_response_stale")
+    calls = []
+    fetch = counting_fetch(calls, delay=0.05)
+
+    async def run():
+        # ttl=0: запись сразу устаревшая, но еще лежит в redis
+        await responses._store("top?limit=10", {"value": 0}, ttl=0)
+        stale = await asyncio.gather(*(responses.get_or_fetch("top?limit=10", fetch, ttl=60) for _ in range(3)))
+        await asyncio.sleep(0.1)
+        fresh = await responses.get_or_fetch("top?limit=10", fetch, ttl=60)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale == [{"value": 0}] * 3
+    assert fresh == {"value": 1}
+    assert calls == [1]
+    assert (responses.stale_hits, responses.hits, responses.misses) == (3, 1, 0)
+
+
+def test_failed_refresh_keeps_stale_entry(redis):
+    responses = ResponseCache("test_response_refresh_error")
+
+    async def failing_fetch():
+        raise RuntimeError("bitquery is down")
+
+    async def run():
+        await responses._store("top?limit=10", {"value": 0}, ttl=0)
+        first = await responses.get_or_fetch("top?limit=10", failing_fetch, ttl=60)
+        await asyncio.sleep(0.05)
+        second = await responses.get_or_fetch("top?limit=10", failing_fetch, ttl=60)
+        await asyncio.sleep(0.05)
+        return first, second
+
+    assert asyncio.run(run()) == ({"value": 0}, {"value": 0})
@@ -0,0 +1,39 @@
+"""
+Canned (mock and FAQ) answers.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import os
+import json
+
+from src.config import settings
+from src.utils.canned import CannedAnswers
+
+MOCKS = {"  How to buy Bitcoin?": "very easy"}
+
+
+def test_mock_answers_need_marker_and_match_normalized(monkeypatch):
+    monkeypatch.setattr(settings, "CANNED_ANSWERS_PATH", "")
+    canned = CannedAnswers(MOCKS)
+    canned.load()
+
+    assert canned.match("  How to buy Bitcoin?") == "very easy"
+    assert canned.match("  how to buy   bitcoin") == "very easy"
+    assert canned.match("How to buy Bitcoin?") is None
+
+
+def test_faq_file_is_matched_and_broken_file_is_retried(monkeypatch, tmp_path):
+    path = tmp_path / "faq.json"
+    path.write_text("{broken", encoding="utf-8")
+    monkeypatch.setattr(settings, "CANNED_ANSWERS_PATH", str(path))
+    monkeypatch.setattr(settings, "CANNED_ANSWERS_RELOAD", 0)
+    canned = CannedAnswers(MOCKS)
+    canned.load()
+    assert canned.match("What is Solana?") is None
+
+    # Файл починили с тем же mtime (грубое разрешение mtime на некоторых ФС) - все равно перечитываем
+    mtime = os.stat(path).st_mtime
+    path.write_text(json.dumps({"What is Solana?": "a blockchain"}), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    assert canned.match("what is solana") == "a blockchain"
@@ -0,0 +1,39 @@
+"""
+Rule based intent router for short widget requests.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+from src.utils.intent_router import IntentRouter
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+
+def test_short_widget_requests_are_routed():
+    router = IntentRouter()
+
+    assert router.route("chart $BONK 4h") == ("ChartDetailsAndStats", {"token_ca": "$BONK", "timeframe": "4h"})
+    assert router.route("$WIF holders") == ("TopTokenHolders", {"token_ca": "$WIF", "timeframe": None})
+    assert router.route(f"wallet balance {SOL_MINT}") == ("TokenBalanceAndTokens", {"mint_address": SOL_MINT})
+    assert router.route("trending 1h") == ("TopTrendingTokens", {"timeframe": "1h"})
+    assert router.route("swap SOL to $BONK") == ("TokenSwap", {"swapA": "SOL", "swapB": "$BONK"})
+    assert router.stats()["hits"] == 5
+
+
+def test_questions_analysis_and_negations_defer_to_agent():
+    router = IntentRouter()
+
+    for input_message in [
+        "why did $BONK price dump",
+        "should I sell $WIF price",
+        "$BONK price prediction 1d",
+        "explain the chart of $BONK",
+        "don't show chart $BONK",
+        "$BONK vs $WIF chart",
+        "chart $BONK 4h?",
+        "chart $BONK $WIF",
+        "chart $BONK holders",
+        "wallet balance $BONK",
+    ]:
+        assert router.route(input_message) is None, f"Routed '{input_message}' without agent"
+    assert router.stats() == {"hits": 0, "misses": 10, "hit_rate": 0}
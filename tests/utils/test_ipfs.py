@@ -0,0 +1,78 @@
+"""
+IPFS metadata enrichment, network calls replaced by slow coroutines.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import asyncio
+
+from src.config import settings
+from src.utils import ipfs
+
+SLOW_URI = "https://ipfs.io/ipfs/QmSlowCid"
+
+
+def test_lookup_missing_deadline_is_cached_in_background(monkeypatch):
+    calls = []
+
+    async def slow_fetch(uri, ipfs_hash):
+        calls.append(uri)
+        await asyncio.sleep(0.2)
+        return {"description": "slow token"}
+
+    monkeypatch.setattr(ipfs, "_fetch_ipfs_metadata", slow_fetch)
+    monkeypatch.setattr(settings, "IPFS_DEADLINE", 0.05)
+
+    async def run():
+        first = [{"Uri": SLOW_URI}]
+        await ipfs.enrich_with_metadata(first)
+        await asyncio.sleep(0.3)
+        second = [{"Uri": SLOW_URI}]
+        await ipfs.enrich_with_metadata(second)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first[0]["description"] == ""
+    assert second[0]["description"] == "slow token"
+    assert calls == [SLOW_URI]
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeClient:
+    """Original uri is not found, `hanging` gateway never answers, others answer fast"""
+
+    def __init__(self, hanging: str):
+        self.hanging = hanging
+
+    async def get(self, url, timeout=None):
+        if url.startswith(self.hanging):
+            await asyncio.sleep(10)
+        await asyncio.sleep(0.01)
+        if url.startswith("https://example.com"):
+            return FakeResponse(404, {})
+        return FakeResponse(200, {"image": "https://ipfs.io/ipfs/QmImage"})
+
+
+def test_hanging_gateway_loses_its_place(monkeypatch):
+    scores = ipfs.GatewayScores(ipfs.IPFS_GATEWAYS)
+    hanging = scores.ordered()[0]
+    monkeypatch.setattr(ipfs, "gateway_scores", scores)
+    monkeypatch.setattr(ipfs, "get_client", lambda name: FakeClient(hanging))
+    monkeypatch.setattr(settings, "IPFS_HEDGE_DELAY", 0.05)
+
+    async def run():
+        for _ in range(3):
+            metadata = await ipfs._fetch_ipfs_metadata("https://example.com/ipfs/QmCid", "QmCid")
+            assert metadata["image"]
+
+    asyncio.run(run())
+    assert scores.error_rate[hanging] > 0
+    assert scores.ordered()[0] != hanging
@@ -0,0 +1,24 @@
+"""
+Vendored agent prompt loads without hub access.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+from pathlib import Path
+
+from langchain_core.load import loads
+from langchain_core.prompts import ChatPromptTemplate
+
+PROMPT_PATH = Path(__file__).resolve().parents[2] / "src" / "prompts" / "hwchase17" / "openai-tools-agent" / "v1.json"
+
+
+def test_vendored_agent_prompt_loads_with_core_objects_only():
+    # Так же, как load_prompt в src/utils/chat.py
+    prompt = loads(PROMPT_PATH.read_text(encoding="utf-8"), allowed_objects="core")
+
+    assert isinstance(prompt, ChatPromptTemplate)
+    assert "input" in prompt.input_variables
+    assert [message.variable_name for message in prompt.messages if hasattr(message, "variable_name")] == [
+        "chat_history",
+        "agent_scratchpad",
+    ]
@@ -0,0 +1,55 @@
+"""
+Search cache in front of Perplexity tools, local tier only (no redis).
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import asyncio
+
+from src.config import settings
+from src.utils.search_cache import SearchCache, extract_entities, normalize_query, query_ttl
+
+
+def counting_search(calls: list, delay: float = 0.0):
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"answer": len(calls)}
+    return search
+
+
+def test_concurrent_misses_share_one_search():
+    cache = SearchCache("test_single_flight")
+    calls = []
+    search = counting_search(calls, delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_search("why is BTC up", "sonar", "month", search) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == [1]
+    assert all(result == {"answer": 1} for result in results)
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_similar_query_about_other_token_is_a_miss(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_CACHE_SIMILARITY", True)
+    cache = SearchCache("test_entities")
+    calls = []
+    search = counting_search(calls)
+
+    async def run():
+        await cache.get_or_search("why is BTC pumping today", "sonar", "month", search)
+        await cache.get_or_search("why is btc pumping up today", "sonar", "month", search)
+        await cache.get_or_search("why is SOL pumping today", "sonar", "month", search)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.stats()["similar_hits"] == 1
+    assert extract_entities("why is BTC pumping today") != extract_entities("why is SOL pumping today")
+
+
+def test_time_words_shorten_ttl():
+    assert query_ttl(normalize_query("What is Solana?"), "month") == settings.SEARCH_CACHE_TTL["month"]
+    assert query_ttl(normalize_query("solana news today"), "month") == settings.SEARCH_CACHE_TTL["day"]
+    assert query_ttl(normalize_query("latest solana news"), "month") == settings.SEARCH_CACHE_TTL["hour"]
@@ -0,0 +1,43 @@
+"""
+Ticker -> mint address index, in-process tier only (no redis).
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+import asyncio
+
+from src.utils.token_index import TokenIndex
+
+WIF = {"Name": "dogwifhat", "Symbol": "$WIF", "MintAddress": "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm"}
+# Bitquery находит токен и по тикеру в другой форме
+CURRENCIES = {"WIF": WIF, "WIFHAT": WIF}
+
+
+def counting_lookup(calls: list):
+    async def lookup(symbol: str):
+        calls.append(symbol)
+        return CURRENCIES.get(symbol.lstrip("$").upper())
+    return lookup
+
+
+def test_unknown_ticker_is_looked_up_once():
+    index = TokenIndex("test_token_index_unknown")
+    calls = []
+
+    async def run():
+        return [await index.resolve_symbol("NOPE", counting_lookup(calls)) for _ in range(3)]
+
+    assert asyncio.run(run()) == [None, None, None]
+    assert calls == ["NOPE"]
+    assert index.stats()["negative_hits"] == 2
+
+
+def test_queried_ticker_is_indexed_when_symbol_differs():
+    index = TokenIndex("test_token_index_alias")
+    calls = []
+
+    async def run():
+        return [await index.resolve_symbol("wifhat", counting_lookup(calls)) for _ in range(2)]
+
+    assert asyncio.run(run()) == [WIF["MintAddress"]] * 2
+    assert calls == ["wifhat"]
@@ -0,0 +1,24 @@
+"""
+Token usage accounting of agent runs.
+
+Run from repo root (settings need env):
+    BITQUERY_API_KEY=x REDIS_HOST=localhost python -m pytest tests/utils
+"""
+from langchain_core.messages import AIMessage
+
+from src.utils.usage import token_usage
+
+
+def test_token_usage_from_model_end_output():
+    message = AIMessage(content="hi", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12})
+    output = {"generations": [[{"text": "hi", "message": message}]], "llm_output": None}
+
+    assert token_usage(output)["input_tokens"] == 10
+    assert token_usage(message)["output_tokens"] == 2
+
+
+def test_token_usage_of_failed_call_is_empty():
+    # Так on_chat_model_end приходит при ошибке OpenAI (APIConnectionError и т.п.)
+    assert token_usage({"generations": [[]], "llm_output": None}) == {}
+    assert token_usage({"generations": []}) == {}
+    assert token_usage(None) == {}